@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    # Admin mutations are recorded into an in-memory buffer and written to a
+    # capped collection in batches by a background task, so handlers never
+    # wait on the audit insert. If Mongo is unavailable the buffer is kept
+    # (up to max_buffer entries, oldest dropped first) and retried.
+    def __init__(self, db, name: str = "audit_log", size_bytes: int = 16 * 1024 * 1024, batch_size: int = 100, flush_interval: float = 1.0, max_buffer: int = 10000):
+        self.db = db
+        self.name = name
+        self.size_bytes = size_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=max_buffer)
+        self.dropped = 0
+        self._wakeup: asyncio.Event = None
+        self._stopping = False
+        self._task = None
+
+    @property
+    def collection(self):
+        return self.db[self.name]
+
+    async def start(self):
+        await self.db.create_capped_collection(self.name, self.size_bytes)
+        await self.collection.create_index("ts")
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # Let the loop finish its current write instead of cancelling it
+        # mid-batch, then write whatever is left
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def record(self, actor: dict, route: str, collection: str, target_id: str, operation: str, diff: dict = None):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append({
+            "id": str(uuid.uuid4()),
+            "ts": datetime.now(timezone.utc).isoformat(timespec='microseconds'),
+            "actor": actor.get("email"),
+            "actor_id": actor.get("id"),
+            "route": route,
+            "collection": collection,
+            "target_id": target_id,
+            "operation": operation,
+            "diff": diff or {},
+        })
+        if self._wakeup is not None and len(self.buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        while self.buffer:
+            batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+            try:
+                await self.collection.insert_many(batch, ordered=False)
+            except asyncio.CancelledError:
+                self.buffer.extendleft(reversed(batch))
+                raise
+            except BulkWriteError as e:
+                # Entries that already made it in on an earlier attempt come
+                # back as duplicate key errors; only retry the rest.
+                failed = [batch[err["index"]] for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+                if failed:
+                    logger.error("Failed to write %d audit entries, will retry", len(failed))
+                    self.buffer.extendleft(reversed(failed))
+                    return
+            except Exception:
+                logger.exception("Failed to write %d audit entries, will retry", len(batch))
+                # Put the batch back in front, preserving order
+                self.buffer.extendleft(reversed(batch))
+                return
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def query(self, limit: int = 50, before: str = None, collection: str = None, actor: str = None):
+        query = {}
+        if before:
+            query["ts"] = {"$lt": before}
+        if collection:
+            query["collection"] = collection
+        if actor:
+            query["actor"] = actor
+        return await self.collection.find(query, {"_id": 0}, sort=[("ts", -1)], limit=limit)
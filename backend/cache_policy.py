@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+import os
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheRule:
+    # max_age and the stale windows apply to the CDN, which is purged on
+    # writes. Browsers cannot be purged, so they only get browser_max_age
+    # and never serve stale copies.
+    surrogate_key: str
+    max_age: int = 60
+    browser_max_age: int = 0
+    stale_while_revalidate: int = 300
+    stale_if_error: int = 86400
+
+    def header(self) -> str:
+        # s-maxage covers CDNs that do not read CDN-Cache-Control
+        return f"public, max-age={self.browser_max_age}, s-maxage={self.max_age}"
+
+    def cdn_header(self) -> str:
+        return f"max-age={self.max_age}, stale-while-revalidate={self.stale_while_revalidate}, stale-if-error={self.stale_if_error}"
+
+
+class CachePolicyMiddleware:
+    # Adds Cache-Control, CDN-Cache-Control and Surrogate-Key headers to
+    # successful GET/HEAD responses of the routes in `rules` (keyed by exact
+    # path). Responses that already carry a Cache-Control header are left
+    # alone.
+    def __init__(self, app, rules: Dict[str, CacheRule]):
+        self.app = app
+        self.rules = {
+            path: [
+                (b"cache-control", rule.header().encode("latin-1")),
+                (b"cdn-cache-control", rule.cdn_header().encode("latin-1")),
+                (b"surrogate-key", rule.surrogate_key.encode("latin-1")),
+            ]
+            for path, rule in rules.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or scope["path"] not in self.rules:
+            return await self.app(scope, receive, send)
+        cache_headers = self.rules[scope["path"]]
+
+        async def send_with_cache_headers(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = list(message.get("headers", []))
+                if not any(name.lower() == b"cache-control" for name, _ in headers):
+                    message["headers"] = headers + cache_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
+
+
+class Purger(ABC):
+    @abstractmethod
+    async def purge(self, keys: Iterable[str]):
+        ...
+
+
+class NoopPurger(Purger):
+    async def purge(self, keys):
+        pass
+
+
+class LoggingPurger(Purger):
+    # Local stand-in for a CDN: records what would have been purged
+    async def purge(self, keys):
+        logger.info("CDN purge of surrogate keys: %s", ", ".join(sorted(keys)))
+
+
+class HTTPPurger(Purger):
+    # POSTs {"surrogate_keys": [...]} to a purge endpoint; adapt the URL and
+    # token to the CDN's surrogate-key purge API
+    def __init__(self, url: str, token: str = None, timeout: float = 5.0):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+
+    def _post(self, keys: list):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"surrogate_keys": keys}).encode("utf-8"),
+            headers={"Content-Type": "application/json", **({"Authorization": f"Bearer {self.token}"} if self.token else {})},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def purge(self, keys):
+        await asyncio.to_thread(self._post, sorted(keys))
+
+
+class PurgeScheduler:
+    # Collects surrogate keys from writes and purges them together after a
+    # short delay, without making the write handler wait on the CDN
+    def __init__(self, purger: Purger, delay: float = 0.5):
+        self.purger = purger
+        self.delay = delay
+        self._keys = set()
+        self._task = None
+
+    def schedule(self, key: str):
+        if isinstance(self.purger, NoopPurger):
+            return
+        self._keys.add(key)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._task = None
+        keys, self._keys = self._keys, set()
+        try:
+            await self.purger.purge(keys)
+        except Exception as e:
+            logger.error("CDN purge of %s failed: %s", ", ".join(sorted(keys)), e)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def get_purger() -> Purger:
+    backend = os.environ.get('CDN_PURGE_BACKEND', 'none').lower()
+    if backend == 'log':
+        return LoggingPurger()
+    if backend == 'http':
+        return HTTPPurger(os.environ['CDN_PURGE_URL'], token=os.environ.get('CDN_PURGE_TOKEN'))
+    return NoopPurger()
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    # Concurrent callers asking for the same key share one in-flight call
+    # and its result (or exception). Nothing is cached: once the call
+    # finishes the next caller starts a fresh one.
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+            # shield: one waiter being cancelled must not cancel the call
+            # the others are waiting on
+            return await asyncio.shield(future)
+        self.calls += 1
+        future = asyncio.ensure_future(fn())
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(future)
+
+    def forget(self, match: Callable[[Hashable], bool]):
+        # Calls already running keep their waiters, but later callers start
+        # a new one; used after a write so nobody joins a pre-write read
+        for key in [key for key in self._inflight if match(key)]:
+            del self._inflight[key]
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved even if every waiter has gone
+            future.exception()
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import logging
+from itertools import count
+
+logger = logging.getLogger(__name__)
+
+_CLOSE = None
+
+
+class Subscriber:
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # Drop whatever is still buffered so the close marker always fits
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+
+class EventHub:
+    # Fans change notifications out to Server-Sent Events clients. Each event
+    # is encoded once and pushed onto every subscriber's bounded queue; a
+    # client whose queue is full is disconnected rather than allowed to
+    # buffer without limit or slow down the publisher. `retry` is the
+    # reconnect delay sent to clients.
+    def __init__(self, max_queue: int = 64, heartbeat: float = 15.0, max_subscribers: int = 10000, retry: float = 2.0):
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.retry = retry
+        self.max_subscribers = max_subscribers
+        self.subscribers = set()
+        self._ids = count(1)
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def subscribe(self) -> Subscriber:
+        if self.full:
+            raise OverflowError("Too many event stream subscribers")
+        subscriber = Subscriber(self.max_queue)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event: dict):
+        if not self.subscribers:
+            return
+        frame = f"id: {next(self._ids)}\nevent: change\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                logger.info("Disconnecting slow event stream consumer")
+                subscriber.close()
+                self.unsubscribe(subscriber)
+
+    def close(self):
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+        self.subscribers.clear()
+
+    async def stream(self):
+        # Subscribing here rather than in the handler ties the subscription
+        # to the generator, so a stream cancelled before it starts never
+        # holds a slot
+        try:
+            subscriber = self.subscribe()
+        except OverflowError:
+            return
+        try:
+            yield f"retry: {int(self.retry * 1000)}\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if frame is _CLOSE:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(subscriber)
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+
+class JobQueue:
+    # In-process queue for work that should not hold up an HTTP response.
+    # Jobs run on the event loop with at most `concurrency` in flight, and
+    # every state change is mirrored to the `jobs` collection so anything
+    # still pending when the process stops is picked up again on start().
+    def __init__(self, collection, concurrency: int = 4, max_attempts: int = 5, base_delay: float = 2.0, max_delay: float = 300.0):
+        self.collection = collection
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.handlers: Dict[str, JobHandler] = {}
+        self._queue: asyncio.Queue = None
+        self._workers = []
+        self._background = set()
+        # Jobs whose latest state could not be written yet, by id
+        self._unsaved: Dict[str, dict] = {}
+        self._saver = None
+
+    def register(self, name: str, handler: JobHandler):
+        self.handlers[name] = handler
+
+    def enqueue(self, name: str, payload: dict) -> str:
+        if name not in self.handlers:
+            raise ValueError(f"No handler registered for job '{name}'")
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "last_error": None,
+            "created_at": now,
+            "run_at": now,
+        }
+        # Persisting the job is not awaited by the caller; the worker only
+        # ever upserts by id, so the two writes can land in either order.
+        self._spawn(self._insert(job, dict(job)))
+        if self._queue is not None:
+            self._queue.put_nowait(job)
+        return job["id"]
+
+    async def start(self):
+        # Every state change is an upsert by id and recovery filters on
+        # status; finished jobs are expired by a TTL index on finished_at
+        # that the application creates with the rest of its indexes
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index("status")
+        self._queue = asyncio.Queue()
+        pending = await self.collection.find({"status": {"$in": ["pending", "running"]}}, {"_id": 0}, limit=None)
+        now = datetime.now(timezone.utc)
+        for job in pending:
+            run_at = datetime.fromisoformat(job["run_at"]) if job.get("run_at") else now
+            self._schedule(job, max((run_at - now).total_seconds(), 0))
+        if pending:
+            logger.info("Recovered %d pending jobs", len(pending))
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        tasks = [*self._workers, *([self._saver] if self._saver else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        task.add_done_callback(self._log_failure)
+        return task
+
+    @staticmethod
+    def _log_failure(task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Job queue background task failed: %s", task.exception())
+
+    def _schedule(self, job: dict, delay: float):
+        if delay <= 0:
+            self._queue.put_nowait(job)
+        else:
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job)
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+
+    async def _insert(self, job: dict, snapshot: dict):
+        try:
+            await self.collection.update_one({"id": job["id"]}, {"$setOnInsert": snapshot}, upsert=True)
+        except Exception as e:
+            logger.warning("Could not save job %s, will retry: %s", job["id"], e)
+            self._keep_unsaved(job)
+
+    async def _save(self, job: dict) -> bool:
+        # Writes the job's current state, so a retried write never
+        # overwrites a newer one with stale fields
+        state = {key: job[key] for key in ("status", "attempts", "last_error", "run_at", "finished_at") if key in job}
+        immutable = {key: job[key] for key in ("name", "payload", "created_at")}
+        try:
+            await self.collection.update_one({"id": job["id"]}, {"$set": state, "$setOnInsert": immutable}, upsert=True)
+        except Exception as e:
+            logger.warning("Could not save state of job %s, will retry: %s", job["id"], e)
+            return False
+        return True
+
+    async def _set(self, job: dict, **fields):
+        # A failed write does not hold up the job itself; the in-memory state
+        # stays authoritative and is written again with backoff
+        job.update(fields)
+        if await self._save(job):
+            self._unsaved.pop(job["id"], None)
+        else:
+            self._keep_unsaved(job)
+
+    def _keep_unsaved(self, job: dict):
+        self._unsaved[job["id"]] = job
+        if self._saver is None:
+            self._saver = self._spawn(self._save_later())
+
+    async def _save_later(self):
+        attempt = 0
+        try:
+            while self._unsaved:
+                attempt += 1
+                await asyncio.sleep(self._backoff(attempt))
+                for job_id, job in list(self._unsaved.items()):
+                    if await self._save(job) and self._unsaved.get(job_id) is job:
+                        del self._unsaved[job_id]
+        finally:
+            self._saver = None
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Never drop the job on an unexpected error; retry it like a
+                # failed run
+                if job["attempts"] < self.max_attempts:
+                    delay = self._backoff(max(job["attempts"], 1))
+                    logger.exception("Job %s (%s) crashed, retrying in %.0fs", job["id"], job["name"], delay)
+                    self._schedule(job, delay)
+                else:
+                    logger.exception("Job %s (%s) crashed", job["id"], job["name"])
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: dict):
+        handler = self.handlers.get(job["name"])
+        if handler is None:
+            await self._set(job, status="failed", last_error=f"No handler for '{job['name']}'", finished_at=datetime.now(timezone.utc))
+            return
+        await self._set(job, status="running", attempts=job["attempts"] + 1)
+        try:
+            await handler(job["payload"])
+        except Exception as e:
+            if job["attempts"] >= self.max_attempts:
+                logger.error("Job %s (%s) failed permanently: %s", job["id"], job["name"], e)
+                await self._set(job, status="failed", last_error=str(e), finished_at=datetime.now(timezone.utc))
+                return
+            delay = self._backoff(job["attempts"])
+            run_at = datetime.now(timezone.utc).timestamp() + delay
+            logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job["id"], job["name"], delay, e)
+            await self._set(job, status="pending", last_error=str(e), run_at=datetime.fromtimestamp(run_at, timezone.utc).isoformat())
+            self._schedule(job, delay)
+            return
+        await self._set(job, status="done", last_error=None, finished_at=datetime.now(timezone.utc))
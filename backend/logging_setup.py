@@ -0,0 +1,150 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else came in through `extra`.
+# color_message is uvicorn's ANSI-coloured duplicate of the message.
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id", "color_message"}
+
+
+class RequestIdFilter(logging.Filter):
+    # Runs in the emitting task, where the request's context is visible
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # Only merge args here; tracebacks travel as exc_text so the listener's
+    # formatter can place them itself instead of inside the message.
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def _parse_levels(spec: str):
+    # "uvicorn.access=INFO,storage=DEBUG"
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        yield name.strip(), level.strip().upper()
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    # Handlers on the event loop thread only enqueue records; formatting and
+    # the actual stream write happen on the QueueListener's thread. The
+    # caller starts and stops the listener; records logged before it starts
+    # wait in the queue.
+    if os.environ.get("LOG_FORMAT", "json").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    # Uvicorn configures its loggers with their own stream handlers before
+    # the app is imported; route them through the queue as well. Its access
+    # line duplicates AccessLogMiddleware, so it is off unless LOG_LEVELS
+    # turns it back on.
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    logging.getLogger("uvicorn.access").setLevel("WARNING")
+    for name, level in _parse_levels(os.environ.get("LOG_LEVELS", "")):
+        logging.getLogger(name).setLevel(level)
+
+    return logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+
+
+class AccessLogMiddleware:
+    # Assigns each request a correlation id (taken from X-Request-ID when
+    # the client sends one), echoes it in the response and logs a sample of
+    # requests with their route and duration. Errors and slow requests are
+    # always logged.
+    def __init__(self, app, sample_rate: float = 1.0, slow_ms: float = 1000.0, logger_name: str = "access"):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if status >= 500 or duration_ms >= self.slow_ms or random.random() < self.sample_rate:
+                route = scope.get("route")
+                self.logger.info(
+                    "%s %s %d %.1fms", scope["method"], scope["path"], status, duration_ms,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": getattr(route, "path", None),
+                        "status": status,
+                        "duration_ms": round(duration_ms, 2),
+                    },
+                )
+            request_id_var.reset(token)
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+import os
+import smtplib
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+
+class Mailer(ABC):
+    @abstractmethod
+    async def send(self, to: str, subject: str, body: str):
+        ...
+
+
+class ConsoleMailer(Mailer):
+    # Default backend: writes the message to the log instead of delivering it.
+    async def send(self, to: str, subject: str, body: str):
+        logger.info("Email to %s: %s\n%s", to, subject, body)
+
+
+class SMTPMailer(Mailer):
+    # Point SMTP_HOST/SMTP_PORT at a local debugging server (e.g. MailHog on
+    # localhost:1025) to exercise delivery without sending real mail.
+    def __init__(self, host: str, port: int, sender: str, username: str = None, password: str = None, use_tls: bool = False):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+
+    def _send_sync(self, message: EmailMessage):
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+    async def send(self, to: str, subject: str, body: str):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = to
+        message['Subject'] = subject
+        message.set_content(body)
+        # smtplib is blocking, keep it off the event loop
+        await asyncio.to_thread(self._send_sync, message)
+
+
+def get_mailer() -> Mailer:
+    backend = os.environ.get('EMAIL_BACKEND', 'console').lower()
+    if backend == 'smtp':
+        return SMTPMailer(
+            host=os.environ.get('SMTP_HOST', 'localhost'),
+            port=int(os.environ.get('SMTP_PORT', '1025')),
+            sender=os.environ.get('SMTP_SENDER', 'no-reply@dhadak.local'),
+            username=os.environ.get('SMTP_USERNAME'),
+            password=os.environ.get('SMTP_PASSWORD'),
+            use_tls=os.environ.get('SMTP_USE_TLS', 'false').lower() == 'true',
+        )
+    return ConsoleMailer()
@@ -0,0 +1,85 @@
+import asyncio
+import gzip
+import json
+import logging
+from datetime import datetime, timezone
+from itertools import groupby
+from pathlib import Path
+
+from bson import Binary
+
+logger = logging.getLogger(__name__)
+
+TTL_INDEX_NAME = "retention_ttl"
+
+
+def _compress(docs: list) -> bytes:
+    lines = "".join(json.dumps(doc, default=str, separators=(",", ":")) + "\n" for doc in docs)
+    return gzip.compress(lines.encode("utf-8"))
+
+
+class ContactArchiver:
+    # Moves contact submissions older than a cutoff out of the hot
+    # collection into one compressed archive per calendar month, either as
+    # documents in `contact_archive` or as gzip files under archive_dir.
+    def __init__(self, db, archive_dir: str = None, batch_size: int = 500):
+        self.db = db
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.batch_size = batch_size
+
+    async def _store(self, month: str, docs: list):
+        blob = _compress(docs)
+        if self.archive_dir is not None:
+            path = self.archive_dir / f"contact-{month}.jsonl.gz"
+            # Concatenated gzip members read back as a single stream
+            await asyncio.to_thread(self._append_file, path, blob)
+            return
+        await self.db.contact_archive.update_one(
+            {"month": month},
+            {
+                "$push": {"chunks": Binary(blob)},
+                "$inc": {"count": len(docs)},
+                "$set": {"updated_at": datetime.now(timezone.utc).isoformat()},
+            },
+            upsert=True,
+        )
+
+    def _append_file(self, path: Path, blob: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(blob)
+
+    async def archive_before(self, cutoff: datetime) -> int:
+        archived = 0
+        while True:
+            docs = await self.db.contact_submissions.find(
+                {"created_ts": {"$lt": cutoff}}, {"_id": 0, "created_ts": 0},
+                sort=[("created_at", 1)], limit=self.batch_size,
+            )
+            if not docs:
+                break
+            for month, group in groupby(docs, key=lambda doc: str(doc["created_at"])[:7]):
+                await self._store(month, list(group))
+            # Only delete once the batch is safely archived
+            await self.db.contact_submissions.delete_many({"id": {"$in": [doc["id"] for doc in docs]}})
+            archived += len(docs)
+            if len(docs) < self.batch_size:
+                break
+        if archived:
+            logger.info("Archived %d contact submissions older than %s", archived, cutoff.isoformat())
+        return archived
+
+    async def read_month(self, month: str) -> list:
+        if self.archive_dir is not None:
+            path = self.archive_dir / f"contact-{month}.jsonl.gz"
+            if not path.exists():
+                return []
+            raw = await asyncio.to_thread(lambda: gzip.decompress(path.read_bytes()))
+            return [json.loads(line) for line in raw.decode("utf-8").splitlines() if line]
+        archive = await self.db.contact_archive.find_one({"month": month}, {"_id": 0})
+        if not archive:
+            return []
+        docs = []
+        for chunk in archive["chunks"]:
+            docs.extend(json.loads(line) for line in gzip.decompress(chunk).decode("utf-8").splitlines() if line)
+        return docs
@@ -1,10 +1,14 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
+import asyncio
 import logging
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional
@@ -12,13 +16,25 @@ import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
+from jobs import JobQueue
+from mailer import get_mailer
+from events import EventHub
+from audit import AuditLog
+from retention import TTL_INDEX_NAME, ContactArchiver
+from snapshot import ReadReplica
+from storage import create_storage
+from spam import ContactFilter
+from coalesce import SingleFlight
+from logging_setup import AccessLogMiddleware, configure_logging
+from cache_policy import CachePolicyMiddleware, CacheRule, PurgeScheduler, get_purger
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+log_listener = configure_logging()
+
+# STORAGE_BACKEND=memory runs the API without a mongod (tests, benchmarks)
+db = create_storage()
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -27,6 +43,64 @@ security = HTTPBearer()
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = "HS256"
 
+event_hub = EventHub(
+    max_queue=int(os.environ.get('EVENTS_QUEUE_SIZE', '64')),
+    heartbeat=float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', '15')),
+    max_subscribers=int(os.environ.get('EVENTS_MAX_CLIENTS', '10000')),
+    retry=float(os.environ.get('EVENTS_RETRY_SECONDS', '2')),
+)
+
+audit_log = AuditLog(
+    db,
+    size_bytes=int(os.environ.get('AUDIT_LOG_SIZE_MB', '16')) * 1024 * 1024,
+    batch_size=int(os.environ.get('AUDIT_BATCH_SIZE', '100')),
+    flush_interval=float(os.environ.get('AUDIT_FLUSH_SECONDS', '1')),
+)
+
+# Contact submissions are archived after CONTACT_ARCHIVE_AFTER_DAYS and
+# expired by a TTL index after CONTACT_RETENTION_DAYS; 0 disables either.
+CONTACT_RETENTION_DAYS = int(os.environ.get('CONTACT_RETENTION_DAYS', '0'))
+CONTACT_ARCHIVE_AFTER_DAYS = int(os.environ.get('CONTACT_ARCHIVE_AFTER_DAYS', '0'))
+CONTACT_ARCHIVE_INTERVAL_HOURS = float(os.environ.get('CONTACT_ARCHIVE_INTERVAL_HOURS', '24'))
+
+contact_archiver = ContactArchiver(db, archive_dir=os.environ.get('CONTACT_ARCHIVE_DIR'))
+archival_task = None
+
+contact_filter = ContactFilter(
+    db,
+    window=int(os.environ.get('CONTACT_DUPLICATE_WINDOW_SECONDS', '86400')),
+    burst_limit=int(os.environ.get('CONTACT_BURST_LIMIT', '5')),
+    burst_window=int(os.environ.get('CONTACT_BURST_WINDOW_SECONDS', '600')),
+    quarantine_score=float(os.environ.get('CONTACT_QUARANTINE_SCORE', '0.6')),
+)
+
+# Dashboard statistics are cached briefly, keyed by the number of recent
+# items requested
+ADMIN_STATS_TTL_SECONDS = float(os.environ.get('ADMIN_STATS_TTL_SECONDS', '30'))
+admin_stats_cache = {}
+
+# Public routes a CDN may cache, with the surrogate key purged when the
+# matching collection changes
+CACHEABLE_ROUTES = {
+    "/api/gallery": "gallery",
+    "/api/achievements": "achievements",
+    "/api/team": "team",
+    "/api/workshop": "workshops",
+    "/api/about": "about",
+}
+cache_purges = PurgeScheduler(get_purger())
+
+ADMIN_NOTIFY_EMAIL = os.environ.get('ADMIN_NOTIFY_EMAIL')
+
+mailer = get_mailer()
+job_queue = JobQueue(
+    db.jobs,
+    concurrency=int(os.environ.get('JOB_CONCURRENCY', '4')),
+    max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', '5')),
+)
+# Finished jobs are kept for JOB_RETENTION_DAYS; 0 keeps them forever
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', '7'))
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=7)
@@ -40,6 +114,102 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     except:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+def admin_context(request: Request, payload: dict = Depends(verify_token)):
+    return {"actor": payload, "route": f"{request.method} {request.url.path}"}
+
+ABOUT_KEY = "about"
+DEFAULT_ABOUT_CONTENT = "Dhadak is the official dance committee of our college. We are a vibrant community of dancers passionate about various dance forms and cultural expression."
+
+SYNCED_COLLECTIONS = ["gallery", "achievements", "team", "workshops"]
+
+# Deletes on synced collections leave a tombstone so /changes can report them
+LIVE = {"deleted": {"$ne": True}}
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+def tombstone():
+    now = now_iso()
+    return {"$set": {"deleted": True, "deleted_at": now, "updated_at": now}}
+
+def parse_timestamps(doc: dict):
+    for field in ('created_at', 'updated_at'):
+        if isinstance(doc.get(field), str):
+            doc[field] = datetime.fromisoformat(doc[field])
+    return doc
+
+def record_change(collection: str, doc_id: str, operation: str, ctx: dict = None, diff: dict = None):
+    # Called by every mutating handler once its write has succeeded
+    read_coalescer.forget(lambda key: key[0] == collection)
+    admin_stats_cache.clear()
+    event_hub.publish({"collection": collection, "id": doc_id, "operation": operation})
+    # Purging before the snapshot has the write would let the CDN refetch
+    # and cache the old content
+    read_replica.mark_dirty(collection, on_fresh=lambda: cache_purges.schedule(collection))
+    if ctx is not None:
+        audit_log.record(ctx["actor"], ctx["route"], collection, doc_id, operation, diff)
+
+UNAUDITED_FIELDS = ('_id', 'id', 'created_at', 'updated_at')
+
+def diff_fields(before: dict, after: dict):
+    before = before or {}
+    return {
+        field: [before.get(field), value]
+        for field, value in after.items()
+        if field not in UNAUDITED_FIELDS and before.get(field) != value
+    }
+
+# Public list queries, shared by the handlers and the read replica
+PUBLIC_LIST_SORT = {
+    "gallery": ("created_at", -1),
+    "achievements": ("created_at", -1),
+    "team": ("order", 1),
+    "workshops": ("created_at", -1),
+}
+
+# A burst of identical reads shares a single query; callers must treat the
+# returned documents as read-only
+read_coalescer = SingleFlight()
+
+def public_list_loader(collection: str):
+    field, direction = PUBLIC_LIST_SORT[collection]
+    async def query():
+        return await db[collection].find(LIVE, {"_id": 0}, sort=[(field, direction)], limit=1000)
+    async def load():
+        return await read_coalescer.do((collection, field, direction, 1000), query)
+    return load
+
+async def load_about_content():
+    async def query():
+        # updated_by is an admin's email; it stays in the history and audit log
+        return await db.about.find_one({"key": ABOUT_KEY}, {"_id": 0, "key": 0, "updated_by": 0})
+    return await read_coalescer.do(("about", ABOUT_KEY), query)
+
+# A change token is the (updated_at, id) position of the last document
+# returned, so documents sharing a timestamp are never skipped between pages
+def encode_change_token(position: tuple) -> str:
+    iso, doc_id = position
+    stamp = datetime.fromisoformat(iso)
+    return f"{int(stamp.timestamp() * 1_000_000)}-{doc_id}"
+
+def decode_change_token(token: str) -> tuple:
+    # Tokens issued before the id was included decode with an empty id
+    micros, _, doc_id = token.partition('-')
+    stamp = datetime.fromtimestamp(int(micros) / 1_000_000, timezone.utc)
+    return stamp.isoformat(timespec='microseconds'), doc_id
+
+read_replica = ReadReplica(
+    Path(os.environ.get('READ_REPLICA_PATH', ROOT_DIR / 'read_replica.sqlite3')),
+    loaders={
+        **{collection: public_list_loader(collection) for collection in PUBLIC_LIST_SORT},
+        "about": load_about_content,
+    },
+    mode=os.environ.get('READ_REPLICA_MODE', 'fallback').lower(),
+    max_staleness=float(os.environ.get('READ_REPLICA_MAX_STALENESS_SECONDS', '86400')),
+    refresh_interval=float(os.environ.get('READ_REPLICA_REFRESH_SECONDS', '60')),
+    mongo_timeout=float(os.environ.get('READ_REPLICA_MONGO_TIMEOUT_SECONDS', '2')),
+)
+
 class Admin(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -61,6 +231,7 @@ class GalleryPhoto(BaseModel):
     image_url: str
     caption: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None
 
 class GalleryPhotoCreate(BaseModel):
     image_url: str
@@ -74,6 +245,7 @@ class Achievement(BaseModel):
     image_url: Optional[str] = None
     date: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None
 
 class AchievementCreate(BaseModel):
     title: str
@@ -92,6 +264,7 @@ class TeamMember(BaseModel):
     twitter: Optional[str] = None
     order: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None
 
 class TeamMemberCreate(BaseModel):
     name: str
@@ -112,6 +285,7 @@ class Workshop(BaseModel):
     image_url: Optional[str] = None
     is_active: bool = True
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None
 
 class WorkshopCreate(BaseModel):
     title: str
@@ -127,6 +301,8 @@ class ContactSubmission(BaseModel):
     name: str
     email: EmailStr
     message: str
+    spam_score: float = 0.0
+    quarantined: bool = False
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class ContactSubmissionCreate(BaseModel):
@@ -134,14 +310,10 @@ class ContactSubmissionCreate(BaseModel):
     email: EmailStr
     message: str
 
-class AboutContent(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    content: str
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
 class AboutContentUpdate(BaseModel):
     content: str
+    # Version the edit was based on; omit to overwrite unconditionally
+    version: Optional[int] = None
 
 @api_router.post("/admin/register")
 async def register_admin(admin: AdminRegister):
@@ -170,155 +342,377 @@ async def login_admin(admin: AdminLogin):
     token = create_access_token({"email": admin.email, "id": admin_doc['id']})
     return {"token": token, "email": admin.email}
 
-@api_router.post("/gallery", dependencies=[Depends(verify_token)])
-async def create_gallery_photo(photo: GalleryPhotoCreate):
+@api_router.post("/gallery")
+async def create_gallery_photo(photo: GalleryPhotoCreate, ctx: dict = Depends(admin_context)):
     photo_obj = GalleryPhoto(**photo.model_dump())
+    photo_obj.updated_at = photo_obj.created_at
     doc = photo_obj.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['created_at']
     await db.gallery.insert_one(doc)
+    record_change("gallery", photo_obj.id, "create", ctx, diff_fields(None, doc))
     return photo_obj
 
 @api_router.get("/gallery", response_model=List[GalleryPhoto])
 async def get_gallery_photos():
-    photos = await db.gallery.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for photo in photos:
-        if isinstance(photo['created_at'], str):
-            photo['created_at'] = datetime.fromisoformat(photo['created_at'])
-    return photos
-
-@api_router.delete("/gallery/{photo_id}", dependencies=[Depends(verify_token)])
-async def delete_gallery_photo(photo_id: str):
-    result = await db.gallery.delete_one({"id": photo_id})
-    if result.deleted_count == 0:
+    photos = await read_replica.read("gallery")
+    return [parse_timestamps(dict(photo)) for photo in photos]
+
+@api_router.delete("/gallery/{photo_id}")
+async def delete_gallery_photo(photo_id: str, ctx: dict = Depends(admin_context)):
+    before = await db.gallery.find_one_and_update({"id": photo_id, **LIVE}, tombstone(), projection={"_id": 0, "id": 1})
+    if before is None:
         raise HTTPException(status_code=404, detail="Photo not found")
+    record_change("gallery", photo_id, "delete", ctx, {"deleted": [False, True]})
     return {"message": "Photo deleted"}
 
-@api_router.post("/achievements", dependencies=[Depends(verify_token)])
-async def create_achievement(achievement: AchievementCreate):
+@api_router.post("/achievements")
+async def create_achievement(achievement: AchievementCreate, ctx: dict = Depends(admin_context)):
     achievement_obj = Achievement(**achievement.model_dump())
+    achievement_obj.updated_at = achievement_obj.created_at
     doc = achievement_obj.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['created_at']
     await db.achievements.insert_one(doc)
+    record_change("achievements", achievement_obj.id, "create", ctx, diff_fields(None, doc))
     return achievement_obj
 
 @api_router.get("/achievements", response_model=List[Achievement])
 async def get_achievements():
-    achievements = await db.achievements.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for achievement in achievements:
-        if isinstance(achievement['created_at'], str):
-            achievement['created_at'] = datetime.fromisoformat(achievement['created_at'])
-    return achievements
-
-@api_router.put("/achievements/{achievement_id}", dependencies=[Depends(verify_token)])
-async def update_achievement(achievement_id: str, achievement: AchievementCreate):
+    achievements = await read_replica.read("achievements")
+    return [parse_timestamps(dict(achievement)) for achievement in achievements]
+
+@api_router.put("/achievements/{achievement_id}")
+async def update_achievement(achievement_id: str, achievement: AchievementCreate, ctx: dict = Depends(admin_context)):
     doc = achievement.model_dump()
-    result = await db.achievements.update_one({"id": achievement_id}, {"$set": doc})
-    if result.matched_count == 0:
+    doc['updated_at'] = now_iso()
+    before = await db.achievements.find_one_and_update({"id": achievement_id, **LIVE}, {"$set": doc}, projection={"_id": 0}, return_document=ReturnDocument.BEFORE)
+    if before is None:
         raise HTTPException(status_code=404, detail="Achievement not found")
+    record_change("achievements", achievement_id, "update", ctx, diff_fields(before, doc))
     return {"message": "Achievement updated"}
 
-@api_router.delete("/achievements/{achievement_id}", dependencies=[Depends(verify_token)])
-async def delete_achievement(achievement_id: str):
-    result = await db.achievements.delete_one({"id": achievement_id})
-    if result.deleted_count == 0:
+@api_router.delete("/achievements/{achievement_id}")
+async def delete_achievement(achievement_id: str, ctx: dict = Depends(admin_context)):
+    before = await db.achievements.find_one_and_update({"id": achievement_id, **LIVE}, tombstone(), projection={"_id": 0, "id": 1})
+    if before is None:
         raise HTTPException(status_code=404, detail="Achievement not found")
+    record_change("achievements", achievement_id, "delete", ctx, {"deleted": [False, True]})
     return {"message": "Achievement deleted"}
 
-@api_router.post("/team", dependencies=[Depends(verify_token)])
-async def create_team_member(member: TeamMemberCreate):
+@api_router.post("/team")
+async def create_team_member(member: TeamMemberCreate, ctx: dict = Depends(admin_context)):
     member_obj = TeamMember(**member.model_dump())
+    member_obj.updated_at = member_obj.created_at
     doc = member_obj.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['created_at']
     await db.team.insert_one(doc)
+    record_change("team", member_obj.id, "create", ctx, diff_fields(None, doc))
     return member_obj
 
 @api_router.get("/team", response_model=List[TeamMember])
 async def get_team_members():
-    members = await db.team.find({}, {"_id": 0}).sort("order", 1).to_list(1000)
-    for member in members:
-        if isinstance(member['created_at'], str):
-            member['created_at'] = datetime.fromisoformat(member['created_at'])
-    return members
-
-@api_router.put("/team/{member_id}", dependencies=[Depends(verify_token)])
-async def update_team_member(member_id: str, member: TeamMemberCreate):
+    members = await read_replica.read("team")
+    return [parse_timestamps(dict(member)) for member in members]
+
+@api_router.put("/team/{member_id}")
+async def update_team_member(member_id: str, member: TeamMemberCreate, ctx: dict = Depends(admin_context)):
     doc = member.model_dump()
-    result = await db.team.update_one({"id": member_id}, {"$set": doc})
-    if result.matched_count == 0:
+    doc['updated_at'] = now_iso()
+    before = await db.team.find_one_and_update({"id": member_id, **LIVE}, {"$set": doc}, projection={"_id": 0}, return_document=ReturnDocument.BEFORE)
+    if before is None:
         raise HTTPException(status_code=404, detail="Team member not found")
+    record_change("team", member_id, "update", ctx, diff_fields(before, doc))
     return {"message": "Team member updated"}
 
-@api_router.delete("/team/{member_id}", dependencies=[Depends(verify_token)])
-async def delete_team_member(member_id: str):
-    result = await db.team.delete_one({"id": member_id})
-    if result.deleted_count == 0:
+@api_router.delete("/team/{member_id}")
+async def delete_team_member(member_id: str, ctx: dict = Depends(admin_context)):
+    before = await db.team.find_one_and_update({"id": member_id, **LIVE}, tombstone(), projection={"_id": 0, "id": 1})
+    if before is None:
         raise HTTPException(status_code=404, detail="Team member not found")
+    record_change("team", member_id, "delete", ctx, {"deleted": [False, True]})
     return {"message": "Team member deleted"}
 
-@api_router.post("/workshop", dependencies=[Depends(verify_token)])
-async def create_workshop(workshop: WorkshopCreate):
+@api_router.post("/workshop")
+async def create_workshop(workshop: WorkshopCreate, ctx: dict = Depends(admin_context)):
     workshop_obj = Workshop(**workshop.model_dump())
+    workshop_obj.updated_at = workshop_obj.created_at
     doc = workshop_obj.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['created_at']
     await db.workshops.insert_one(doc)
+    record_change("workshops", workshop_obj.id, "create", ctx, diff_fields(None, doc))
     return workshop_obj
 
 @api_router.get("/workshop", response_model=List[Workshop])
 async def get_workshops():
-    workshops = await db.workshops.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for workshop in workshops:
-        if isinstance(workshop['created_at'], str):
-            workshop['created_at'] = datetime.fromisoformat(workshop['created_at'])
-    return workshops
-
-@api_router.put("/workshop/{workshop_id}", dependencies=[Depends(verify_token)])
-async def update_workshop(workshop_id: str, workshop: WorkshopCreate):
+    workshops = await read_replica.read("workshops")
+    return [parse_timestamps(dict(workshop)) for workshop in workshops]
+
+@api_router.put("/workshop/{workshop_id}")
+async def update_workshop(workshop_id: str, workshop: WorkshopCreate, ctx: dict = Depends(admin_context)):
     doc = workshop.model_dump()
-    result = await db.workshops.update_one({"id": workshop_id}, {"$set": doc})
-    if result.matched_count == 0:
+    doc['updated_at'] = now_iso()
+    before = await db.workshops.find_one_and_update({"id": workshop_id, **LIVE}, {"$set": doc}, projection={"_id": 0}, return_document=ReturnDocument.BEFORE)
+    if before is None:
         raise HTTPException(status_code=404, detail="Workshop not found")
+    record_change("workshops", workshop_id, "update", ctx, diff_fields(before, doc))
     return {"message": "Workshop updated"}
 
-@api_router.delete("/workshop/{workshop_id}", dependencies=[Depends(verify_token)])
-async def delete_workshop(workshop_id: str):
-    result = await db.workshops.delete_one({"id": workshop_id})
-    if result.deleted_count == 0:
+@api_router.delete("/workshop/{workshop_id}")
+async def delete_workshop(workshop_id: str, ctx: dict = Depends(admin_context)):
+    before = await db.workshops.find_one_and_update({"id": workshop_id, **LIVE}, tombstone(), projection={"_id": 0, "id": 1})
+    if before is None:
         raise HTTPException(status_code=404, detail="Workshop not found")
+    record_change("workshops", workshop_id, "delete", ctx, {"deleted": [False, True]})
     return {"message": "Workshop deleted"}
 
+@api_router.get("/events")
+async def stream_events():
+    if event_hub.full:
+        raise HTTPException(status_code=503, detail="Too many event stream clients")
+    return StreamingResponse(
+        event_hub.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.get("/admin/audit", dependencies=[Depends(verify_token)])
+async def get_audit_log(limit: int = 50, before: Optional[str] = None, collection: Optional[str] = None, actor: Optional[str] = None):
+    limit = max(1, min(limit, 500))
+    entries = await audit_log.query(limit=limit, before=before, collection=collection, actor=actor)
+    return {
+        "entries": entries,
+        "next": entries[-1]['ts'] if len(entries) == limit else None,
+    }
+
+@api_router.get("/changes")
+async def get_changes(since: Optional[str] = None, limit: int = 1000):
+    # Returns everything created, updated or deleted after `since`. Without a
+    # token this is a full snapshot of live documents; the returned `next`
+    # token is passed back on the following call.
+    since_position = None
+    if since is not None:
+        try:
+            since_position = decode_change_token(since)
+        except (ValueError, OverflowError):
+            raise HTTPException(status_code=400, detail="Invalid change token")
+    if since_position is None:
+        query = LIVE
+    else:
+        since_iso, since_id = since_position
+        query = {"$or": [{"updated_at": {"$gt": since_iso}}, {"updated_at": since_iso, "id": {"$gt": since_id}}]}
+    limit = max(1, min(limit, 1000))
+
+    results = await asyncio.gather(*(
+        db[collection].find(query, {"_id": 0}, sort=[("updated_at", 1), ("id", 1)], limit=limit)
+        for collection in SYNCED_COLLECTIONS
+    ))
+
+    changes = {}
+    latest = since_position
+    truncated_at = None
+    for collection, docs in zip(SYNCED_COLLECTIONS, results):
+        upserted, deleted = [], []
+        for doc in docs:
+            if doc.get('deleted'):
+                deleted.append(doc['id'])
+            else:
+                doc.pop('deleted', None)
+                upserted.append(doc)
+            position = (doc['updated_at'], doc['id'])
+            if latest is None or position > latest:
+                latest = position
+        if len(docs) == limit:
+            # Only advance up to the last document seen in a truncated
+            # collection so the next page picks up where this one stopped.
+            last = (docs[-1]['updated_at'], docs[-1]['id'])
+            if truncated_at is None or last < truncated_at:
+                truncated_at = last
+        changes[collection] = {"upserted": upserted, "deleted": deleted}
+
+    next_position = truncated_at if truncated_at is not None else latest
+    return {
+        "changes": changes,
+        "next": encode_change_token(next_position) if next_position else since,
+        "has_more": truncated_at is not None,
+    }
+
 @api_router.post("/contact")
 async def create_contact_submission(contact: ContactSubmissionCreate):
-    contact_obj = ContactSubmission(**contact.model_dump())
+    verdict = await contact_filter.check(contact.name, contact.email, contact.message)
+    if verdict.status == "duplicate":
+        # Already stored; answer as if it were new so resubmits are harmless
+        return {"message": "Message sent successfully"}
+    quarantined = verdict.status == "quarantine"
+    contact_obj = ContactSubmission(**contact.model_dump(), spam_score=verdict.score, quarantined=quarantined)
     doc = contact_obj.model_dump()
+    doc['fingerprint'] = verdict.fingerprint
+    # BSON date copy of created_at for the retention TTL index
+    doc['created_ts'] = doc['created_at']
     doc['created_at'] = doc['created_at'].isoformat()
-    await db.contact_submissions.insert_one(doc)
+    try:
+        await db.contact_submissions.insert_one(doc)
+    except Exception:
+        await contact_filter.release(verdict.fingerprint)
+        raise
+    admin_stats_cache.clear()
+    if ADMIN_NOTIFY_EMAIL and not quarantined:
+        job_queue.enqueue("contact_notification", {"submission_id": contact_obj.id})
     return {"message": "Message sent successfully"}
 
 @api_router.get("/contact", dependencies=[Depends(verify_token)], response_model=List[ContactSubmission])
-async def get_contact_submissions():
-    submissions = await db.contact_submissions.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
+async def get_contact_submissions(quarantined: bool = False):
+    query = {"quarantined": True} if quarantined else {"quarantined": {"$ne": True}}
+    submissions = await db.contact_submissions.find(query, {"_id": 0, "created_ts": 0}, sort=[("created_at", -1)], limit=1000)
     for submission in submissions:
         if isinstance(submission['created_at'], str):
             submission['created_at'] = datetime.fromisoformat(submission['created_at'])
     return submissions
 
+def stats_pipeline(recent: int, match: dict, recent_match: dict = None, exclude: tuple = (), extra_facets: dict = None):
+    projection = {"_id": 0, **{field: 0 for field in exclude}}
+    return [
+        {"$match": match},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "recent": [{"$match": recent_match or {}}, {"$sort": {"created_at": -1}}, {"$limit": recent}, {"$project": projection}],
+            **(extra_facets or {}),
+        }},
+    ]
+
+async def compute_admin_stats(recent: int):
+    pipelines = {collection: stats_pipeline(recent, LIVE) for collection in SYNCED_COLLECTIONS}
+    pipelines["contact_submissions"] = stats_pipeline(
+        recent,
+        {},
+        recent_match={"quarantined": {"$ne": True}},
+        exclude=("created_ts", "fingerprint"),
+        extra_facets={
+            "quarantined": [{"$match": {"quarantined": True}}, {"$count": "count"}],
+            "by_month": [
+                {"$group": {"_id": {"$substrBytes": ["$created_at", 0, 7]}, "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}},
+            ],
+        },
+    )
+    results = await asyncio.gather(*(db[collection].aggregate(pipeline) for collection, pipeline in pipelines.items()))
+
+    stats = {}
+    for collection, (facets,) in zip(pipelines, results):
+        entry = {
+            "total": facets["total"][0]["count"] if facets["total"] else 0,
+            "recent": [parse_timestamps(doc) for doc in facets["recent"]],
+        }
+        if "by_month" in facets:
+            entry["quarantined"] = facets["quarantined"][0]["count"] if facets["quarantined"] else 0
+            entry["by_month"] = [{"month": row["_id"], "count": row["count"]} for row in facets["by_month"]]
+        stats[collection] = entry
+    stats["generated_at"] = datetime.now(timezone.utc)
+    return stats
+
+@api_router.get("/admin/stats", dependencies=[Depends(verify_token)])
+async def get_admin_stats(recent: int = 5):
+    recent = max(1, min(recent, 50))
+    cached = admin_stats_cache.get(recent)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    stats = await compute_admin_stats(recent)
+    admin_stats_cache[recent] = (time.monotonic() + ADMIN_STATS_TTL_SECONDS, stats)
+    return stats
+
+@api_router.get("/admin/contact-filter/stats", dependencies=[Depends(verify_token)])
+async def get_contact_filter_stats():
+    return contact_filter.stats()
+
 @api_router.get("/about")
 async def get_about_content():
-    content = await db.about.find_one({}, {"_id": 0})
+    content = await read_replica.read("about")
     if not content:
-        return {"content": "Dhadak is the official dance committee of our college. We are a vibrant community of dancers passionate about various dance forms and cultural expression."}
-    if isinstance(content.get('updated_at'), str):
-        content['updated_at'] = datetime.fromisoformat(content['updated_at'])
-    return content
-
-@api_router.put("/about", dependencies=[Depends(verify_token)])
-async def update_about_content(about: AboutContentUpdate):
-    content_obj = AboutContent(content=about.content)
-    doc = content_obj.model_dump()
-    doc['updated_at'] = doc['updated_at'].isoformat()
-    await db.about.delete_many({})
-    await db.about.insert_one(doc)
-    return {"message": "About content updated"}
+        return {"content": DEFAULT_ABOUT_CONTENT}
+    return parse_timestamps(dict(content))
+
+async def write_about_content(content: str, ctx: dict, expected_version: Optional[int] = None):
+    # Single atomic upsert on the fixed key. With an expected version the
+    # filter only matches that version, so a stale edit falls through to the
+    # upsert and collides with the unique key instead of overwriting.
+    query = {"key": ABOUT_KEY}
+    if expected_version is not None:
+        query["version"] = expected_version
+    now = now_iso()
+    new_id = str(uuid.uuid4())
+    try:
+        before = await db.about.find_one_and_update(
+            query,
+            {
+                "$set": {"content": content, "updated_at": now, "updated_by": ctx["actor"].get("email")},
+                "$inc": {"version": 1},
+                "$setOnInsert": {"id": new_id},
+            },
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="About content was modified by someone else")
+    if before:
+        await db.about_history.insert_one({**before, "superseded_at": now})
+    version = (before or {}).get('version', expected_version or 0) + 1
+    record_change("about", before['id'] if before else new_id, "update", ctx, diff_fields(before, {"content": content}))
+    return version
+
+@api_router.put("/about")
+async def update_about_content(about: AboutContentUpdate, ctx: dict = Depends(admin_context)):
+    version = await write_about_content(about.content, ctx, about.version)
+    return {"message": "About content updated", "version": version}
+
+@api_router.get("/about/history", dependencies=[Depends(verify_token)])
+async def get_about_history(limit: int = 20):
+    limit = max(1, min(limit, 100))
+    return await db.about_history.find({}, {"_id": 0, "key": 0}, sort=[("version", -1)], limit=limit)
+
+@api_router.post("/about/revert/{version}")
+async def revert_about_content(version: int, ctx: dict = Depends(admin_context)):
+    previous = await db.about_history.find_one({"version": version}, {"_id": 0})
+    if not previous:
+        raise HTTPException(status_code=404, detail="About version not found")
+    new_version = await write_about_content(previous['content'], ctx)
+    return {"message": f"About content reverted to version {version}", "version": new_version}
+
+@api_router.get("/contact/archive/{month}", dependencies=[Depends(verify_token)])
+async def get_archived_contact_submissions(month: str):
+    try:
+        datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Month must be formatted as YYYY-MM")
+    return await contact_archiver.read_month(month)
+
+async def send_contact_notification(payload: dict):
+    if not ADMIN_NOTIFY_EMAIL:
+        return
+    submission = await db.contact_submissions.find_one({"id": payload["submission_id"]}, {"_id": 0})
+    if not submission:
+        return
+    await mailer.send(
+        ADMIN_NOTIFY_EMAIL,
+        f"New contact message from {submission['name']}",
+        f"From: {submission['name']} <{submission['email']}>\n\n{submission['message']}",
+    )
+
+job_queue.register("contact_notification", send_contact_notification)
+
+async def archive_contact_submissions(payload: dict):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=payload["older_than_days"])
+    if await contact_archiver.archive_before(cutoff):
+        admin_stats_cache.clear()
+
+job_queue.register("contact_archive", archive_contact_submissions)
+
+async def schedule_contact_archival():
+    while True:
+        job_queue.enqueue("contact_archive", {"older_than_days": CONTACT_ARCHIVE_AFTER_DAYS})
+        await asyncio.sleep(CONTACT_ARCHIVE_INTERVAL_HOURS * 3600)
 
 app.include_router(api_router)
 
@@ -330,12 +724,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+app.add_middleware(
+    CachePolicyMiddleware,
+    rules={
+        path: CacheRule(
+            surrogate_key,
+            max_age=int(os.environ.get('CACHE_MAX_AGE_SECONDS', '60')),
+            browser_max_age=int(os.environ.get('CACHE_BROWSER_MAX_AGE_SECONDS', '0')),
+            stale_while_revalidate=int(os.environ.get('CACHE_STALE_WHILE_REVALIDATE_SECONDS', '300')),
+            stale_if_error=int(os.environ.get('CACHE_STALE_IF_ERROR_SECONDS', '86400')),
+        )
+        for path, surrogate_key in CACHEABLE_ROUTES.items()
+    },
 )
+
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_rate=float(os.environ.get('ACCESS_LOG_SAMPLE_RATE', '1.0')),
+    slow_ms=float(os.environ.get('ACCESS_LOG_SLOW_MS', '1000')),
+)
+
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_logging():
+    log_listener.start()
+
+@app.on_event("startup")
+async def prepare_change_tracking():
+    for collection in SYNCED_COLLECTIONS:
+        await db[collection].create_index("updated_at")
+        # Backfill documents written before updated_at was tracked
+        legacy = await db[collection].find({"updated_at": {"$exists": False}}, {"_id": 0, "id": 1, "created_at": 1}, limit=None)
+        for doc in legacy:
+            created_at = doc.get('created_at')
+            if isinstance(created_at, datetime):
+                created_at = created_at.isoformat()
+            await db[collection].update_one({"id": doc['id']}, {"$set": {"updated_at": created_at or now_iso()}})
+
+@app.on_event("startup")
+async def prepare_about_content():
+    # Adopt the document written by the old delete_many + insert_one flow
+    if not await db.about.find_one({"key": ABOUT_KEY}, {"_id": 1}):
+        legacy = await db.about.find_one({}, sort=[("updated_at", -1)])
+        if legacy:
+            await db.about.update_one({"_id": legacy["_id"]}, {"$set": {"key": ABOUT_KEY, "version": legacy.get("version", 1)}})
+            await db.about.delete_many({"key": {"$ne": ABOUT_KEY}})
+    await db.about.create_index("key", unique=True)
+    await db.about_history.create_index("version")
+
+@app.on_event("startup")
+async def start_read_replica():
+    await read_replica.start()
+
+@app.on_event("startup")
+async def start_contact_filter():
+    await contact_filter.start()
+
+@app.on_event("startup")
+async def start_job_queue():
+    await db.ensure_ttl_index("jobs", "finished_at", JOB_RETENTION_DAYS * 86400, TTL_INDEX_NAME)
+    await job_queue.start()
+
+@app.on_event("startup")
+async def prepare_contact_retention():
+    global archival_task
+    await db.contact_submissions.create_index("created_at")
+    legacy = await db.contact_submissions.find({"created_ts": {"$exists": False}}, {"_id": 0, "id": 1, "created_at": 1}, limit=None)
+    for doc in legacy:
+        created_at = doc['created_at']
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        await db.contact_submissions.update_one({"id": doc['id']}, {"$set": {"created_ts": created_at}})
+    if CONTACT_ARCHIVE_AFTER_DAYS and CONTACT_RETENTION_DAYS and CONTACT_ARCHIVE_AFTER_DAYS >= CONTACT_RETENTION_DAYS:
+        logger.warning("CONTACT_ARCHIVE_AFTER_DAYS should be below CONTACT_RETENTION_DAYS or submissions expire before they are archived")
+    await db.ensure_ttl_index("contact_submissions", "created_ts", CONTACT_RETENTION_DAYS * 86400, TTL_INDEX_NAME)
+    if CONTACT_ARCHIVE_AFTER_DAYS:
+        archival_task = asyncio.create_task(schedule_contact_archival())
+
+@app.on_event("startup")
+async def start_audit_log():
+    await audit_log.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    if archival_task is not None:
+        archival_task.cancel()
+    event_hub.close()
+    await job_queue.stop()
+    await audit_log.stop()
+    await read_replica.stop()
+    await cache_purges.stop()
+    db.close()
+    log_listener.stop()
\ No newline at end of file
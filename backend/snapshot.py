@@ -0,0 +1,173 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class ReadReplica:
+    # Local copy of the rarely-changing public collections, persisted to
+    # SQLite so it also survives a restart while Mongo is unreachable.
+    #
+    # mode "fallback": read from Mongo, serve the snapshot when that fails.
+    # mode "primary":  serve the snapshot, go to Mongo only when it is stale.
+    # mode "off":      always read from Mongo.
+    #
+    # Snapshots older than max_staleness seconds are never served
+    # (0 disables the bound).
+    def __init__(self, path: Path, loaders: Dict[str, Callable[[], Awaitable]], mode: str = "fallback", max_staleness: float = 3600, refresh_interval: float = 60, debounce: float = 1.0, mongo_timeout: float = 2.0):
+        self.path = Path(path)
+        self.loaders = loaders
+        self.mode = mode
+        self.max_staleness = max_staleness
+        self.refresh_interval = refresh_interval
+        self.debounce = debounce
+        self.mongo_timeout = mongo_timeout
+        self.data = {}
+        self._pending = {}
+        self._dirty = set()
+        self._on_fresh = {}
+        self._stopping = False
+        self._task = None
+
+    @property
+    def enabled(self):
+        return self.mode in ("fallback", "primary")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE IF NOT EXISTS snapshot (name TEXT PRIMARY KEY, payload TEXT NOT NULL, refreshed_at REAL NOT NULL)")
+        return conn
+
+    # The connection context manager only commits; closing() releases it
+    def _load_all(self):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("SELECT name, payload, refreshed_at FROM snapshot").fetchall()
+
+    def _save(self, name: str, payload: str, refreshed_at: float):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO snapshot (name, payload, refreshed_at) VALUES (?, ?, ?)", (name, payload, refreshed_at))
+
+    async def start(self):
+        if not self.enabled:
+            return
+        try:
+            rows = await asyncio.to_thread(self._load_all)
+        except sqlite3.Error:
+            logger.exception("Could not read snapshot file %s", self.path)
+            rows = []
+        for name, payload, refreshed_at in rows:
+            if name in self.loaders:
+                self.data[name] = (json.loads(payload), refreshed_at)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # On 3.11 wait_for can swallow a cancel that races with the loader
+        # finishing, so the loops also check these before waiting again
+        self._stopping = True
+        self._dirty.clear()
+        tasks = [task for task in [self._task, *self._pending.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._pending.clear()
+        self._on_fresh.clear()
+
+    async def refresh(self, name: str):
+        value = await asyncio.wait_for(self.loaders[name](), self.mongo_timeout)
+        self._store(name, value, persist=True)
+        return value
+
+    def _store(self, name: str, value, persist: bool):
+        refreshed_at = time.time()
+        self.data[name] = (value, refreshed_at)
+        if persist:
+            payload = json.dumps(value, default=str)
+            task = asyncio.ensure_future(asyncio.to_thread(self._save, name, payload, refreshed_at))
+            task.add_done_callback(self._log_save_failure)
+
+    def _log_save_failure(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Could not write snapshot file %s: %s", self.path, task.exception())
+
+    def mark_dirty(self, name: str, on_fresh: Callable[[], None] = None):
+        # Coalesces bursts of writes into one refresh per collection.
+        # on_fresh is called once read() reflects the write: right away
+        # unless reads are served from the snapshot, otherwise after the
+        # refresh (even a failed one, so it is never lost).
+        if not self.enabled or name not in self.loaders:
+            if on_fresh is not None:
+                on_fresh()
+            return
+        if on_fresh is not None:
+            if self.mode == "primary":
+                self._on_fresh.setdefault(name, []).append(on_fresh)
+            else:
+                on_fresh()
+        self._dirty.add(name)
+        if name not in self._pending:
+            self._pending[name] = asyncio.ensure_future(self._refresh_later(name))
+
+    async def _refresh_later(self, name: str):
+        # Writes that arrive while a refresh is loading run another one
+        try:
+            while name in self._dirty:
+                await asyncio.sleep(self.debounce)
+                self._dirty.discard(name)
+                callbacks = self._on_fresh.pop(name, [])
+                try:
+                    await self.refresh(name)
+                except Exception as e:
+                    logger.warning("Snapshot refresh of %s failed: %s", name, e)
+                for callback in callbacks:
+                    callback()
+        finally:
+            self._pending.pop(name, None)
+
+    async def _run(self):
+        while not self._stopping:
+            for name in self.loaders:
+                try:
+                    await self.refresh(name)
+                except Exception as e:
+                    logger.warning("Snapshot refresh of %s failed: %s", name, e)
+            if not self._stopping:
+                await asyncio.sleep(self.refresh_interval)
+
+    def cached(self, name: str):
+        entry = self.data.get(name)
+        if entry is None:
+            return MISSING
+        value, refreshed_at = entry
+        if self.max_staleness and time.time() - refreshed_at > self.max_staleness:
+            return MISSING
+        return value
+
+    async def read(self, name: str):
+        if not self.enabled:
+            return await self.loaders[name]()
+        if self.mode == "primary":
+            value = self.cached(name)
+            if value is not MISSING:
+                return value
+        try:
+            value = await asyncio.wait_for(self.loaders[name](), self.mongo_timeout)
+        except Exception as e:
+            value = self.cached(name)
+            if value is MISSING:
+                raise
+            logger.warning("Serving %s from snapshot, Mongo read failed: %s", name, e)
+            return value
+        # A successful live read is as good as a refresh; the periodic task
+        # takes care of writing it to disk.
+        self._store(name, value, persist=False)
+        return value
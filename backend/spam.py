@@ -0,0 +1,142 @@
+import hashlib
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+URL_RE = re.compile(r"(https?://|www\.)\S+", re.IGNORECASE)
+WORD_RE = re.compile(r"\w+")
+
+FINGERPRINT_TTL_INDEX = "fingerprint_ttl"
+
+
+def normalize_email(email: str) -> str:
+    local, _, domain = email.strip().lower().partition("@")
+    # Sub-addressing (name+tag@) reaches the same inbox
+    local = local.split("+", 1)[0]
+    return f"{local}@{domain}"
+
+
+def fingerprint(email: str, message: str) -> str:
+    normalized = " ".join(message.lower().split())
+    message_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{normalize_email(email)}\0{message_hash}".encode("utf-8")).hexdigest()
+
+
+def spam_score(name: str, message: str) -> float:
+    # Cheap heuristics, each contributing to a score between 0 and 1
+    words = WORD_RE.findall(message)
+    links = len(URL_RE.findall(message))
+    score = 0.0
+    if links:
+        density = links / max(len(words), 1)
+        score += min(0.3 + density * 2, 0.6)
+    if URL_RE.search(name):
+        score += 0.4
+    letters = [c for c in message if c.isalpha()]
+    if len(letters) >= 20 and sum(c.isupper() for c in letters) / len(letters) > 0.7:
+        score += 0.2
+    if len(words) < 2:
+        score += 0.1
+    return round(min(score, 1.0), 2)
+
+
+@dataclass
+class Verdict:
+    status: str
+    fingerprint: str
+    score: float = 0.0
+
+
+class ContactFilter:
+    # Screens contact submissions before they are written. Exact repeats
+    # (same normalized email and message) within `window` seconds are
+    # caught by a bounded in-process set first and by a unique index on
+    # `contact_fingerprints` across processes. High-scoring messages are
+    # flagged for quarantine; sending more than burst_limit messages from one
+    # address within burst_window adds quarantine_score to the score. The
+    # address is unverified, so a burst is never grounds for rejection.
+    def __init__(self, db, window: int = 86400, recent_size: int = 10000, burst_limit: int = 5, burst_window: int = 600, quarantine_score: float = 0.6, tracked_senders: int = 10000):
+        self.db = db
+        self.window = window
+        self.recent_size = recent_size
+        self.burst_limit = burst_limit
+        self.burst_window = burst_window
+        self.quarantine_score = quarantine_score
+        self.tracked_senders = tracked_senders
+        self.recent = OrderedDict()
+        self.bursts = OrderedDict()
+        self.counters = Counter()
+
+    async def start(self):
+        await self.db.contact_fingerprints.create_index("fingerprint", unique=True)
+        await self.db.ensure_ttl_index("contact_fingerprints", "created_ts", self.window, FINGERPRINT_TTL_INDEX)
+
+    def _remember(self, fp: str):
+        self.recent[fp] = time.monotonic() + self.window
+        self.recent.move_to_end(fp)
+        while len(self.recent) > self.recent_size:
+            self.recent.popitem(last=False)
+
+    def _seen_recently(self, fp: str) -> bool:
+        expires = self.recent.get(fp)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self.recent[fp]
+            return False
+        return True
+
+    def _over_burst(self, email: str) -> bool:
+        now = time.monotonic()
+        sent = self.bursts.get(email)
+        if sent is None:
+            sent = self.bursts[email] = deque(maxlen=self.burst_limit + 1)
+            while len(self.bursts) > self.tracked_senders:
+                self.bursts.popitem(last=False)
+        self.bursts.move_to_end(email)
+        while sent and sent[0] < now - self.burst_window:
+            sent.popleft()
+        sent.append(now)
+        return len(sent) > self.burst_limit
+
+    async def check(self, name: str, email: str, message: str) -> Verdict:
+        fp = fingerprint(email, message)
+        if self._seen_recently(fp):
+            self.counters["duplicate"] += 1
+            return Verdict("duplicate", fp)
+        try:
+            await self.db.contact_fingerprints.insert_one({"fingerprint": fp, "created_ts": datetime.now(timezone.utc)})
+        except DuplicateKeyError:
+            self._remember(fp)
+            self.counters["duplicate"] += 1
+            return Verdict("duplicate", fp)
+        self._remember(fp)
+        score = spam_score(name, message)
+        if self._over_burst(normalize_email(email)):
+            self.counters["burst"] += 1
+            score = round(min(score + self.quarantine_score, 1.0), 2)
+        if score >= self.quarantine_score:
+            self.counters["quarantined"] += 1
+            return Verdict("quarantine", fp, score)
+        self.counters["accepted"] += 1
+        return Verdict("accept", fp, score)
+
+    async def release(self, fp: str):
+        # Undo a fingerprint whose submission could not be stored, so the
+        # sender's retry is not mistaken for a duplicate
+        self.recent.pop(fp, None)
+        await self.db.contact_fingerprints.delete_one({"fingerprint": fp})
+
+    def stats(self) -> dict:
+        return {
+            "accepted": self.counters["accepted"],
+            "duplicate": self.counters["duplicate"],
+            "burst": self.counters["burst"],
+            "quarantined": self.counters["quarantined"],
+            "recent_fingerprints": len(self.recent),
+            "tracked_senders": len(self.bursts),
+        }
@@ -0,0 +1,564 @@
+import copy
+import heapq
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+Sort = List[Tuple[str, int]]
+
+
+class Repository(ABC):
+    # The subset of collection operations the application uses. Filters,
+    # projections and update documents use Mongo syntax in every backend.
+    @abstractmethod
+    async def find(self, filter: dict = None, projection: dict = None, sort: Sort = None, limit: Optional[int] = None) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def find_one(self, filter: dict = None, projection: dict = None, sort: Sort = None) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def insert_one(self, doc: dict):
+        ...
+
+    @abstractmethod
+    async def insert_many(self, docs: List[dict], ordered: bool = True):
+        ...
+
+    @abstractmethod
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False) -> int:
+        ...
+
+    @abstractmethod
+    async def find_one_and_update(self, filter: dict, update: dict, projection: dict = None, upsert: bool = False, return_document=ReturnDocument.BEFORE) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def delete_one(self, filter: dict) -> int:
+        ...
+
+    @abstractmethod
+    async def delete_many(self, filter: dict) -> int:
+        ...
+
+    @abstractmethod
+    async def create_index(self, field: str, unique: bool = False, **kwargs):
+        ...
+
+    @abstractmethod
+    async def aggregate(self, pipeline: List[dict]) -> List[dict]:
+        ...
+
+
+class Storage(ABC):
+    # Collections are reached as attributes (storage.gallery) or items
+    # (storage["gallery"]), mirroring a Motor database handle.
+    @abstractmethod
+    def collection(self, name: str) -> Repository:
+        ...
+
+    def __getattr__(self, name: str) -> Repository:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.collection(name)
+
+    def __getitem__(self, name: str) -> Repository:
+        return self.collection(name)
+
+    @abstractmethod
+    async def create_capped_collection(self, name: str, size_bytes: int):
+        ...
+
+    @abstractmethod
+    async def ensure_ttl_index(self, collection: str, field: str, seconds: int, name: str):
+        ...
+
+    def close(self):
+        pass
+
+
+class MotorRepository(Repository):
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def find(self, filter=None, projection=None, sort=None, limit=None):
+        cursor = self._collection.find(filter or {}, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        return await cursor.to_list(limit)
+
+    async def find_one(self, filter=None, projection=None, sort=None):
+        return await self._collection.find_one(filter or {}, projection, sort=sort)
+
+    async def insert_one(self, doc):
+        await self._collection.insert_one(doc)
+
+    async def insert_many(self, docs, ordered=True):
+        await self._collection.insert_many(docs, ordered=ordered)
+
+    async def update_one(self, filter, update, upsert=False):
+        result = await self._collection.update_one(filter, update, upsert=upsert)
+        return result.matched_count
+
+    async def find_one_and_update(self, filter, update, projection=None, upsert=False, return_document=ReturnDocument.BEFORE):
+        return await self._collection.find_one_and_update(filter, update, projection=projection, upsert=upsert, return_document=return_document)
+
+    async def delete_one(self, filter):
+        result = await self._collection.delete_one(filter)
+        return result.deleted_count
+
+    async def delete_many(self, filter):
+        result = await self._collection.delete_many(filter)
+        return result.deleted_count
+
+    async def create_index(self, field, unique=False, **kwargs):
+        await self._collection.create_index(field, unique=unique, **kwargs)
+
+    async def aggregate(self, pipeline):
+        return await self._collection.aggregate(pipeline).to_list(None)
+
+
+class MotorStorage(Storage):
+    def __init__(self, mongo_url: str, db_name: str):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        self._client = AsyncIOMotorClient(mongo_url)
+        self._db = self._client[db_name]
+        self._repositories: Dict[str, MotorRepository] = {}
+
+    def collection(self, name):
+        if name not in self._repositories:
+            self._repositories[name] = MotorRepository(self._db[name])
+        return self._repositories[name]
+
+    async def create_capped_collection(self, name, size_bytes):
+        try:
+            await self._db.create_collection(name, capped=True, size=size_bytes)
+        except CollectionInvalid:
+            pass
+
+    async def ensure_ttl_index(self, collection, field, seconds, name):
+        # A TTL index cannot be recreated with different options, so an
+        # existing one is adjusted in place with collMod. seconds <= 0
+        # removes it.
+        indexes = await self._db[collection].index_information()
+        if seconds <= 0:
+            if name in indexes:
+                await self._db[collection].drop_index(name)
+            return
+        if name in indexes:
+            if indexes[name].get("expireAfterSeconds") != seconds:
+                await self._db.command("collMod", collection, index={"name": name, "expireAfterSeconds": seconds})
+            return
+        try:
+            await self._db[collection].create_index(field, name=name, expireAfterSeconds=seconds)
+        except OperationFailure as e:
+            logger.error("Could not create TTL index on %s.%s: %s", collection, field, e)
+
+    def close(self):
+        self._client.close()
+
+
+# In-memory backend. Supports the query and update operators the
+# application uses; anything else raises NotImplementedError rather than
+# silently matching differently from Mongo.
+
+_MISSING = object()
+
+
+def _get(doc: dict, path: str):
+    value = doc
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(a, b, op):
+    try:
+        return op(a, b)
+    except TypeError:
+        return False
+
+
+_OPERATORS = {
+    "$gt": lambda a, b: a is not _MISSING and _compare(a, b, lambda x, y: x > y),
+    "$gte": lambda a, b: a is not _MISSING and _compare(a, b, lambda x, y: x >= y),
+    "$lt": lambda a, b: a is not _MISSING and _compare(a, b, lambda x, y: x < y),
+    "$lte": lambda a, b: a is not _MISSING and _compare(a, b, lambda x, y: x <= y),
+    "$ne": lambda a, b: _equals(a, b) is False,
+    "$in": lambda a, b: any(_equals(a, item) for item in b),
+    "$nin": lambda a, b: not any(_equals(a, item) for item in b),
+    "$exists": lambda a, b: (a is not _MISSING) == bool(b),
+    "$regex": lambda a, b: isinstance(a, str) and re.search(b, a) is not None,
+}
+
+
+def _equals(value, expected):
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def matches(doc: dict, filter: dict) -> bool:
+    for key, condition in (filter or {}).items():
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = _get(doc, key)
+        if isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+            for op, operand in condition.items():
+                if op not in _OPERATORS:
+                    raise NotImplementedError(f"Query operator {op} is not supported by the memory backend")
+                if not _OPERATORS[op](value, operand):
+                    return False
+        elif not _equals(value, condition):
+            return False
+    return True
+
+
+def _clone(doc: dict) -> dict:
+    return {key: copy.deepcopy(value) if isinstance(value, (dict, list)) else value for key, value in doc.items()}
+
+
+def project(doc: dict, projection: dict = None) -> dict:
+    if not projection:
+        return _clone(doc)
+    include_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if fields and any(fields.values()) and not all(fields.values()):
+        raise NotImplementedError("Projections mixing inclusion and exclusion are not supported")
+    # {"_id": 1} on its own is an inclusion projection of just _id
+    if all(fields.values()) and (fields or include_id):
+        result = {key: doc[key] for key in fields if key in doc}
+        if include_id and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return _clone(result)
+    excluded = {key for key, value in projection.items() if not value}
+    return _clone({key: value for key, value in doc.items() if key not in excluded})
+
+
+def sort_docs(docs: List[dict], sort: Sort) -> List[dict]:
+    # Stable sorts applied from the least significant key; missing values
+    # order first ascending, like null in Mongo.
+    for field, direction in reversed(sort):
+        def key(doc, field=field):
+            value = _get(doc, field)
+            return (0, 0) if value is _MISSING or value is None else (1, value)
+        docs = sorted(docs, key=key, reverse=direction < 0)
+    return docs
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool):
+    for op, fields in update.items():
+        if op == "$set":
+            doc.update(copy.deepcopy(fields))
+        elif op == "$setOnInsert":
+            if inserting:
+                doc.update(copy.deepcopy(fields))
+        elif op == "$unset":
+            for field in fields:
+                doc.pop(field, None)
+        elif op == "$inc":
+            for field, amount in fields.items():
+                doc[field] = doc.get(field, 0) + amount
+        elif op == "$push":
+            for field, value in fields.items():
+                doc.setdefault(field, []).append(copy.deepcopy(value))
+        else:
+            raise NotImplementedError(f"Update operator {op} is not supported by the memory backend")
+
+
+def _evaluate(doc: dict, expr):
+    if isinstance(expr, str) and expr.startswith('$'):
+        value = _get(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, dict) and len(expr) == 1:
+        (op, args), = expr.items()
+        if op in ("$substr", "$substrBytes"):
+            value, start, length = (_evaluate(doc, arg) for arg in args)
+            return str(value or "")[start:start + length if length >= 0 else None]
+        if op.startswith('$'):
+            raise NotImplementedError(f"Expression {op} is not supported by the memory backend")
+    return expr
+
+
+def _group(docs: List[dict], spec: dict) -> List[dict]:
+    groups = {}
+    for doc in docs:
+        key = _evaluate(doc, spec["_id"])
+        hashable = repr(key)
+        if hashable not in groups:
+            groups[hashable] = {"_id": key, **{field: 0 for field in spec if field != "_id"}}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, arg), = accumulator.items()
+            if op != "$sum":
+                raise NotImplementedError(f"Accumulator {op} is not supported by the memory backend")
+            value = _evaluate(doc, arg)
+            groups[hashable][field] += value if isinstance(value, (int, float)) else 0
+    return list(groups.values())
+
+
+def run_pipeline(docs: List[dict], pipeline: List[dict]) -> List[dict]:
+    for stage in pipeline:
+        (op, arg), = stage.items()
+        if op == "$match":
+            docs = [doc for doc in docs if matches(doc, arg)]
+        elif op == "$sort":
+            docs = sort_docs(docs, list(arg.items()))
+        elif op == "$limit":
+            docs = docs[:arg]
+        elif op == "$skip":
+            docs = docs[arg:]
+        elif op == "$project":
+            docs = [project(doc, arg) for doc in docs]
+        elif op == "$count":
+            docs = [{arg: len(docs)}] if docs else []
+        elif op == "$group":
+            docs = _group(docs, arg)
+        elif op == "$facet":
+            docs = [{name: run_pipeline(docs, sub) for name, sub in arg.items()}]
+        else:
+            raise NotImplementedError(f"Pipeline stage {op} is not supported by the memory backend")
+    return docs
+
+
+class MemoryRepository(Repository):
+    def __init__(self):
+        self.docs: Dict[ObjectId, dict] = {}
+        # field -> value -> set of _ids, used for equality lookups
+        self.indexes: Dict[str, Dict[object, set]] = {}
+        self.unique = set()
+        self.ttl: Optional[Tuple[str, int]] = None
+        # (expiry field value, _id) min-heap; entries for documents that were
+        # since deleted or changed are skipped when popped
+        self._expiry: List[Tuple[datetime, ObjectId]] = []
+        self.create_index_sync("id")
+
+    def set_ttl(self, field: str, seconds: int):
+        self.ttl = (field, seconds) if seconds > 0 else None
+        self._expiry = []
+        if self.ttl is not None:
+            for _id, doc in self.docs.items():
+                self._track_expiry(_id, doc)
+            heapq.heapify(self._expiry)
+
+    def create_index_sync(self, field: str, unique: bool = False):
+        if field not in self.indexes:
+            index = {}
+            for _id, doc in self.docs.items():
+                index.setdefault(self._key(doc.get(field)), set()).add(_id)
+            self.indexes[field] = index
+        if unique:
+            # Missing values index as null and, as in Mongo, only one
+            # document may have them
+            for field_value, ids in self.indexes[field].items():
+                if len(ids) > 1:
+                    raise DuplicateKeyError(f"Duplicate values for unique index on {field}")
+            self.unique.add(field)
+
+    @staticmethod
+    def _key(value):
+        return value if not isinstance(value, (dict, list)) else repr(value)
+
+    def _index_add(self, _id, doc):
+        for field, index in self.indexes.items():
+            index.setdefault(self._key(doc.get(field)), set()).add(_id)
+        if self.ttl is not None:
+            self._track_expiry(_id, doc, push=True)
+
+    @staticmethod
+    def _expiry_value(doc: dict, field: str):
+        value = doc.get(field)
+        if not isinstance(value, datetime):
+            return None
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+    def _track_expiry(self, _id, doc: dict, push: bool = False):
+        value = self._expiry_value(doc, self.ttl[0])
+        if value is None:
+            return
+        if push:
+            heapq.heappush(self._expiry, (value, _id))
+        else:
+            self._expiry.append((value, _id))
+
+    def _index_remove(self, _id, doc):
+        for field, index in self.indexes.items():
+            ids = index.get(self._key(doc.get(field)))
+            if ids is not None:
+                ids.discard(_id)
+                if not ids:
+                    del index[self._key(doc.get(field))]
+
+    def _check_unique(self, doc: dict, own_id=None):
+        for field in self.unique:
+            value = doc.get(field)
+            others = self.indexes[field].get(self._key(value), set()) - {own_id}
+            if others:
+                raise DuplicateKeyError(f"E11000 duplicate key error: {field}: {value!r}")
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        field, seconds = self.ttl
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+        while self._expiry and self._expiry[0][0] < cutoff:
+            value, _id = heapq.heappop(self._expiry)
+            doc = self.docs.get(_id)
+            if doc is not None and self._expiry_value(doc, field) == value:
+                self._index_remove(_id, doc)
+                del self.docs[_id]
+
+    def _candidates(self, filter: dict):
+        # Narrow with the first indexed equality condition, if any
+        for field, condition in (filter or {}).items():
+            if field in self.indexes and not isinstance(condition, (dict, list)):
+                return [self.docs[_id] for _id in self.indexes[field].get(condition, ())]
+        return self.docs.values()
+
+    def _match(self, filter: dict, sort: Sort = None) -> List[dict]:
+        self._expire()
+        docs = [doc for doc in self._candidates(filter) if matches(doc, filter)]
+        if sort:
+            docs = sort_docs(docs, sort)
+        return docs
+
+    def _insert(self, doc: dict):
+        if "_id" not in doc:
+            doc["_id"] = ObjectId()
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error: _id: {doc['_id']!r}")
+        stored = _clone(doc)
+        # Expired documents must not block the insert through a unique index
+        self._expire()
+        self._check_unique(stored)
+        self.docs[stored["_id"]] = stored
+        self._index_add(stored["_id"], stored)
+
+    def _update(self, doc: dict, update: dict, inserting: bool = False):
+        updated = _clone(doc)
+        _apply_update(updated, update, inserting)
+        self._check_unique(updated, own_id=doc["_id"])
+        self._index_remove(doc["_id"], doc)
+        self.docs[doc["_id"]] = updated
+        self._index_add(doc["_id"], updated)
+        return updated
+
+    def _upsert(self, filter: dict, update: dict) -> dict:
+        seed = {key: value for key, value in filter.items() if not key.startswith('$') and not isinstance(value, dict)}
+        doc = copy.deepcopy(seed)
+        _apply_update(doc, update, inserting=True)
+        self._insert(doc)
+        return self.docs[doc["_id"]]
+
+    async def find(self, filter=None, projection=None, sort=None, limit=None):
+        docs = self._match(filter, sort)
+        if limit:
+            docs = docs[:limit]
+        return [project(doc, projection) for doc in docs]
+
+    async def find_one(self, filter=None, projection=None, sort=None):
+        docs = self._match(filter, sort)
+        return project(docs[0], projection) if docs else None
+
+    async def insert_one(self, doc):
+        self._insert(doc)
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            try:
+                self._insert(doc)
+            except DuplicateKeyError:
+                if ordered:
+                    raise
+
+    async def update_one(self, filter, update, upsert=False):
+        docs = self._match(filter)
+        if docs:
+            self._update(docs[0], update)
+            return 1
+        if upsert:
+            self._upsert(filter, update)
+        return 0
+
+    async def find_one_and_update(self, filter, update, projection=None, upsert=False, return_document=ReturnDocument.BEFORE):
+        docs = self._match(filter)
+        if docs:
+            before = docs[0]
+            after = self._update(before, update)
+        elif upsert:
+            before, after = None, self._upsert(filter, update)
+        else:
+            return None
+        result = after if return_document == ReturnDocument.AFTER else before
+        return project(result, projection) if result is not None else None
+
+    async def delete_one(self, filter):
+        docs = self._match(filter)
+        if not docs:
+            return 0
+        self._index_remove(docs[0]["_id"], docs[0])
+        del self.docs[docs[0]["_id"]]
+        return 1
+
+    async def delete_many(self, filter):
+        docs = self._match(filter)
+        for doc in docs:
+            self._index_remove(doc["_id"], doc)
+            del self.docs[doc["_id"]]
+        return len(docs)
+
+    async def create_index(self, field, unique=False, **kwargs):
+        self.create_index_sync(field, unique=unique)
+
+    async def aggregate(self, pipeline):
+        self._expire()
+        return [_clone(doc) for doc in run_pipeline(list(self.docs.values()), pipeline)]
+
+
+class MemoryStorage(Storage):
+    # Process-local, non-persistent backend for tests, benchmarks and
+    # running the API without a mongod. Capped collections are not size
+    # limited.
+    def __init__(self):
+        self._repositories: Dict[str, MemoryRepository] = {}
+
+    def collection(self, name):
+        if name not in self._repositories:
+            self._repositories[name] = MemoryRepository()
+        return self._repositories[name]
+
+    async def create_capped_collection(self, name, size_bytes):
+        self.collection(name)
+
+    async def ensure_ttl_index(self, collection, field, seconds, name):
+        self.collection(collection).set_ttl(field, seconds)
+
+
+def create_storage() -> Storage:
+    backend = os.environ.get('STORAGE_BACKEND', 'mongo').lower()
+    if backend == 'memory':
+        return MemoryStorage()
+    if backend != 'mongo':
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'")
+    return MotorStorage(os.environ['MONGO_URL'], os.environ['DB_NAME'])
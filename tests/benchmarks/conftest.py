@@ -0,0 +1,66 @@
+"""Shared setup for the pytest-benchmark suite.
+
+Run with ``pytest tests/benchmarks``. The API runs in process against the
+in-memory storage backend, so no mongod is needed.
+
+Regression check: ``BENCH_CHECK=1`` compares each benchmark's median with
+``baseline.json`` and fails the session if any is more than
+``BENCH_THRESHOLD`` (default 0.25, i.e. 25%) slower. The baseline is only
+compared on the machine type it was recorded on. ``BENCH_UPDATE_BASELINE=1``
+rewrites the baseline from the current run.
+"""
+import json
+import os
+import platform
+from pathlib import Path
+
+import pytest
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+_results = {}
+
+
+def machine_id():
+    return f"{platform.system()}-{platform.python_implementation()}-{platform.python_version()}-{platform.machine()}"
+
+
+@pytest.fixture(autouse=True)
+def _record_median(request):
+    yield
+    fixture = request.node.funcargs.get("benchmark")
+    stats = getattr(fixture, "stats", None)
+    if stats is not None:
+        _results[f"{request.node.module.__name__.rsplit('.', 1)[-1]}::{request.node.name}"] = stats.stats.median
+
+
+def _regressions(baseline: dict, threshold: float):
+    for name, median in sorted(_results.items()):
+        previous = baseline.get(name)
+        if previous and median > previous * (1 + threshold):
+            yield name, previous, median
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    reporter = session.config.pluginmanager.get_plugin("terminalreporter")
+    write = reporter.write_line if reporter else print
+
+    if os.environ.get("BENCH_UPDATE_BASELINE") == "1":
+        BASELINE_PATH.write_text(json.dumps({"machine": machine_id(), "medians": _results}, indent=2, sort_keys=True) + "\n")
+        write(f"Benchmark baseline written to {BASELINE_PATH}")
+        return
+
+    if os.environ.get("BENCH_CHECK") != "1" or not BASELINE_PATH.exists():
+        return
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if baseline.get("machine") != machine_id():
+        write(f"Skipping benchmark regression check: baseline recorded on {baseline.get('machine')}, running on {machine_id()}")
+        return
+    threshold = float(os.environ.get("BENCH_THRESHOLD", "0.25"))
+    regressions = list(_regressions(baseline["medians"], threshold))
+    for name, previous, median in regressions:
+        write(f"REGRESSION {name}: median {median * 1e6:.1f}us vs baseline {previous * 1e6:.1f}us (+{(median / previous - 1) * 100:.0f}%)", red=True)
+    if regressions:
+        session.exitstatus = 1
@@ -0,0 +1,17 @@
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+pytest.importorskip("pytest_benchmark")
+
+PAYLOAD = {"email": "admin@example.com", "id": "3f1c2b9e-0000-4000-8000-000000000000"}
+
+
+def test_create_access_token(benchmark, server_module):
+    token = benchmark(server_module.create_access_token, PAYLOAD)
+    assert token.count(".") == 2
+
+
+def test_verify_token(benchmark, server_module):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=server_module.create_access_token(PAYLOAD))
+    payload = benchmark(server_module.verify_token, credentials)
+    assert payload["email"] == PAYLOAD["email"]
@@ -0,0 +1,56 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+SIZES = [1, 100, 1000]
+
+
+def _stamp():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _documents(model_name: str, count: int):
+    # Shapes match what the list handlers read back from storage
+    now = _stamp()
+    base = {"id": None, "created_at": now, "updated_at": now}
+    if model_name == "GalleryPhoto":
+        fields = {"image_url": "https://example.com/photo.jpg", "caption": "Opening performance"}
+    elif model_name == "Achievement":
+        fields = {"title": "Inter-college winners", "description": "First place in group dance", "image_url": None, "date": "2024-03-01"}
+    elif model_name == "TeamMember":
+        fields = {"name": "Member", "role": "Choreographer", "image_url": "https://example.com/m.jpg", "instagram": "@member", "linkedin": None, "twitter": None, "order": 1}
+    else:
+        fields = {"title": "Hip hop basics", "description": "Two hour workshop", "date": "2024-04-10", "registration_link": "https://example.com/r", "image_url": None, "is_active": True}
+    return [{**base, **fields, "id": str(uuid.uuid4())} for _ in range(count)]
+
+
+MODELS = ["GalleryPhoto", "Achievement", "TeamMember", "Workshop"]
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("model_name", MODELS)
+def test_validate(benchmark, server_module, model_name, size):
+    model = getattr(server_module, model_name)
+    docs = _documents(model_name, size)
+    result = benchmark(lambda: [model.model_validate(doc) for doc in docs])
+    assert len(result) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("model_name", MODELS)
+def test_dump(benchmark, server_module, model_name, size):
+    model = getattr(server_module, model_name)
+    instances = [model.model_validate(doc) for doc in _documents(model_name, size)]
+    result = benchmark(lambda: [instance.model_dump(mode="json") for instance in instances])
+    assert len(result) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_parse_timestamps(benchmark, server_module, size):
+    # The per-document copy and ISO parse every list handler performs
+    docs = _documents("GalleryPhoto", size)
+    result = benchmark(lambda: [server_module.parse_timestamps(dict(doc)) for doc in docs])
+    assert isinstance(result[0]["created_at"], datetime)
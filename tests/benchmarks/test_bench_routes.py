@@ -0,0 +1,55 @@
+import itertools
+import logging
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+from fastapi.testclient import TestClient
+
+SEED_COUNT = 100
+
+
+@pytest.fixture(scope="module")
+def client(server_module):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with TestClient(server_module.app) as client:
+        token = client.post("/api/admin/register", json={"email": "bench@example.com", "password": "bench-password"}).json()["token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        for i in range(SEED_COUNT):
+            client.post("/api/gallery", json={"image_url": f"https://example.com/{i}.jpg", "caption": f"Photo {i}"})
+            client.post("/api/achievements", json={"title": f"Award {i}", "description": "First place", "date": "2024-01-01"})
+            client.post("/api/team", json={"name": f"Member {i}", "role": "Dancer", "image_url": "https://example.com/m.jpg", "order": i})
+            client.post("/api/workshop", json={"title": f"Workshop {i}", "description": "Basics", "date": "2024-02-01"})
+        client.put("/api/about", json={"content": "Dhadak is the official dance committee."})
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/api/gallery", "/api/achievements", "/api/team", "/api/workshop", "/api/about", "/api/changes"])
+def test_public_get(benchmark, client, path):
+    response = benchmark(client.get, path)
+    assert response.status_code == 200
+
+
+def test_admin_list_contacts(benchmark, client):
+    response = benchmark(client.get, "/api/contact")
+    assert response.status_code == 200
+
+
+def test_submit_contact(benchmark, client):
+    # Distinct sender and message per round so the duplicate and burst
+    # filters let every submission through to the insert
+    counter = itertools.count()
+
+    def submit():
+        n = next(counter)
+        return client.post("/api/contact", json={"name": "Visitor", "email": f"visitor{n}@example.com", "message": f"Interested in joining, message {n}"})
+
+    response = benchmark(submit)
+    assert response.status_code == 200
+
+
+def test_update_achievement(benchmark, client):
+    achievement_id = client.get("/api/achievements").json()[0]["id"]
+    payload = {"title": "Award", "description": "First place", "date": "2024-01-01"}
+    response = benchmark(client.put, f"/api/achievements/{achievement_id}", json=payload)
+    assert response.status_code == 200
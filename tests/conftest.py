@@ -0,0 +1,20 @@
+"""The API is imported in process against the in-memory storage backend,
+so the suite needs no mongod."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ["READ_REPLICA_MODE"] = "off"
+os.environ.setdefault("EMAIL_BACKEND", "console")
+sys.path.insert(0, str(ROOT / "backend"))
+
+
+@pytest.fixture(scope="session")
+def server_module():
+    import server
+    return server
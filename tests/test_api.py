@@ -0,0 +1,111 @@
+import logging
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client(server_module):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with TestClient(server_module.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def admin(client):
+    email = f"admin-{uuid.uuid4().hex[:8]}@example.com"
+    token = client.post("/api/admin/register", json={"email": email, "password": "test-password"}).json()["token"]
+    return {"email": email, "headers": {"Authorization": f"Bearer {token}"}}
+
+
+def test_create_is_audited(client, admin, server_module):
+    photo = client.post("/api/gallery", json={"image_url": "https://example.com/a.jpg", "caption": "Stage"}, headers=admin["headers"]).json()
+    client.portal.call(server_module.audit_log.flush)
+
+    response = client.get("/api/admin/audit", params={"collection": "gallery"}, headers=admin["headers"])
+    assert response.status_code == 200
+    entry = next(entry for entry in response.json()["entries"] if entry["target_id"] == photo["id"])
+    assert entry["operation"] == "create"
+    assert entry["actor"] == admin["email"]
+    assert entry["diff"] == {"image_url": [None, "https://example.com/a.jpg"], "caption": [None, "Stage"]}
+
+
+def test_public_about_hides_editor(client, admin):
+    assert client.put("/api/about", json={"content": "Dhadak dances."}, headers=admin["headers"]).status_code == 200
+
+    about = client.get("/api/about").json()
+    assert about["content"] == "Dhadak dances."
+    assert "updated_by" not in about
+
+
+def test_admin_stats_count_new_contacts(client, admin):
+    before = client.get("/api/admin/stats", headers=admin["headers"]).json()["contact_submissions"]["total"]
+    message = {"name": "Visitor", "email": f"{uuid.uuid4().hex[:8]}@example.com", "message": "I would like to join the committee"}
+    assert client.post("/api/contact", json=message).status_code == 200
+
+    after = client.get("/api/admin/stats", headers=admin["headers"]).json()["contact_submissions"]["total"]
+    assert after == before + 1
+
+
+def changes_token(client):
+    # Page through the feed to its current end
+    response = client.get("/api/changes").json()
+    while response["has_more"]:
+        response = client.get("/api/changes", params={"since": response["next"]}).json()
+    return response["next"]
+
+
+def test_changes_pages_documents_sharing_a_timestamp(client, server_module):
+    token = changes_token(client)
+    stamp = server_module.now_iso()
+    ids = [f"shared-{uuid.uuid4().hex}" for _ in range(5)]
+    for doc_id in ids:
+        client.portal.call(server_module.db.team.insert_one, {"id": doc_id, "name": "Member", "role": "Dancer", "image_url": "x", "order": 0, "created_at": stamp, "updated_at": stamp})
+
+    seen = []
+    while True:
+        response = client.get("/api/changes", params={"since": token, "limit": 2}).json()
+        seen += [doc["id"] for doc in response["changes"]["team"]["upserted"]]
+        token = response["next"]
+        if not response["has_more"]:
+            break
+    assert sorted(set(seen)) == sorted(ids)
+
+
+def test_changes_reports_deletes_and_round_trips_token(client, admin, server_module):
+    photo = client.post("/api/gallery", json={"image_url": "https://example.com/b.jpg"}, headers=admin["headers"]).json()
+    token = changes_token(client)
+    assert client.delete(f"/api/gallery/{photo['id']}", headers=admin["headers"]).status_code == 200
+
+    response = client.get("/api/changes", params={"since": token}).json()
+    assert response["changes"]["gallery"]["deleted"] == [photo["id"]]
+    assert response["changes"]["gallery"]["upserted"] == []
+
+    position = server_module.decode_change_token(response["next"])
+    assert position[1] == photo["id"]
+    assert server_module.encode_change_token(position) == response["next"]
+    assert client.get("/api/changes", params={"since": response["next"]}).json()["changes"]["gallery"]["deleted"] == []
+
+
+def test_changes_rejects_bad_tokens(client):
+    for token in ["not-a-token", "9" * 40 + "-x"]:
+        assert client.get("/api/changes", params={"since": token}).status_code == 400
+
+
+def test_contact_burst_is_stored_in_quarantine(client, admin):
+    email = f"victim-{uuid.uuid4().hex[:8]}@example.com"
+    for i in range(7):
+        response = client.post("/api/contact", json={"name": "Visitor", "email": email, "message": f"Please call me back, attempt {i}"})
+        assert response.status_code == 200
+
+    quarantined = client.get("/api/contact", params={"quarantined": True}, headers=admin["headers"]).json()
+    assert len([submission for submission in quarantined if submission["email"] == email]) == 2
+
+
+def test_public_lists_are_not_cached_by_browsers(client):
+    response = client.get("/api/gallery")
+    assert response.headers["cache-control"] == "public, max-age=0, s-maxage=60"
+    assert response.headers["cdn-cache-control"].startswith("max-age=60, stale-while-revalidate=")
+    assert response.headers["surrogate-key"] == "gallery"
+    assert "cdn-cache-control" not in client.get("/api/changes").headers
@@ -0,0 +1,47 @@
+import asyncio
+
+from audit import AuditLog
+from storage import MemoryStorage
+
+ACTOR = {"email": "admin@example.com", "id": "admin-1"}
+
+
+def test_stop_keeps_the_batch_being_written():
+    async def run():
+        db = MemoryStorage()
+        audit_log = AuditLog(db, batch_size=2, flush_interval=60)
+        await audit_log.start()
+        insert_many = audit_log.collection.insert_many
+        writing = asyncio.Event()
+
+        async def slow_insert_many(docs, ordered=True):
+            writing.set()
+            await asyncio.sleep(0.05)
+            await insert_many(docs, ordered=ordered)
+        audit_log.collection.insert_many = slow_insert_many
+
+        for i in range(3):
+            audit_log.record(ACTOR, "POST /api/gallery", "gallery", str(i), "create")
+        await writing.wait()
+        await audit_log.stop()
+
+        entries = await audit_log.query(limit=10)
+        assert sorted(entry["target_id"] for entry in entries) == ["0", "1", "2"]
+    asyncio.run(run())
+
+
+def test_cancelled_write_returns_batch_to_buffer():
+    async def run():
+        audit_log = AuditLog(MemoryStorage(), batch_size=10)
+
+        async def hanging_insert_many(docs, ordered=True):
+            await asyncio.sleep(60)
+        audit_log.collection.insert_many = hanging_insert_many
+        audit_log.record(ACTOR, "DELETE /api/team/1", "team", "1", "delete")
+
+        flush = asyncio.create_task(audit_log.flush())
+        await asyncio.sleep(0)
+        flush.cancel()
+        await asyncio.gather(flush, return_exceptions=True)
+        assert [entry["target_id"] for entry in audit_log.buffer] == ["1"]
+    asyncio.run(run())
@@ -0,0 +1,18 @@
+import pytest
+
+from cache_policy import CacheRule, Purger
+
+
+def test_browsers_get_a_short_lifetime_and_the_cdn_the_purgeable_one():
+    rule = CacheRule("gallery", max_age=60, browser_max_age=0, stale_while_revalidate=300, stale_if_error=86400)
+    assert rule.header() == "public, max-age=0, s-maxage=60"
+    assert "stale" not in rule.header()
+    assert rule.cdn_header() == "max-age=60, stale-while-revalidate=300, stale-if-error=86400"
+
+
+def test_incomplete_purger_fails_on_instantiation():
+    class Partial(Purger):
+        pass
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from coalesce import SingleFlight
+
+
+def gated(result=None, error=None):
+    calls = []
+    release = asyncio.Event()
+
+    async def fn():
+        calls.append(1)
+        await release.wait()
+        if error is not None:
+            raise error
+        return result
+    return fn, calls, release
+
+
+def test_concurrent_callers_share_one_call():
+    async def run():
+        flight = SingleFlight()
+        fn, calls, release = gated(result=["doc"])
+        waiters = [asyncio.create_task(flight.do("gallery", fn)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*waiters) == [["doc"]] * 5
+        assert (len(calls), flight.calls, flight.shared) == (1, 1, 4)
+
+        # Nothing is cached once the call has finished
+        fn, calls, release = gated(result=["fresh"])
+        release.set()
+        assert await flight.do("gallery", fn) == ["fresh"]
+        assert len(calls) == 1
+    asyncio.run(run())
+
+
+def test_error_reaches_every_waiter():
+    async def run():
+        flight = SingleFlight()
+        fn, calls, release = gated(error=ConnectionError("mongo down"))
+        waiters = [asyncio.create_task(flight.do("team", fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert len(calls) == 1
+    asyncio.run(run())
+
+
+def test_cancelling_one_waiter_keeps_the_shared_call():
+    async def run():
+        flight = SingleFlight()
+        fn, calls, release = gated(result="about")
+        first = asyncio.create_task(flight.do("about", fn))
+        second = asyncio.create_task(flight.do("about", fn))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release.set()
+        assert await second == "about"
+        assert len(calls) == 1
+    asyncio.run(run())
+
+
+def test_forget_makes_later_callers_start_a_new_call():
+    async def run():
+        flight = SingleFlight()
+        stale, _, release_stale = gated(result="before write")
+        fresh, _, release_fresh = gated(result="after write")
+        waiting = asyncio.create_task(flight.do(("team", "order"), stale))
+        await asyncio.sleep(0)
+
+        flight.forget(lambda key: key[0] == "team")
+        later = asyncio.create_task(flight.do(("team", "order"), fresh))
+        await asyncio.sleep(0)
+        release_stale.set()
+        assert await waiting == "before write"
+        # The superseded call finishing does not evict its replacement
+        assert ("team", "order") in flight._inflight
+        release_fresh.set()
+        assert await later == "after write"
+        assert flight.calls == 2
+    asyncio.run(run())
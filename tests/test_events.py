@@ -0,0 +1,75 @@
+import asyncio
+
+from events import EventHub
+
+
+async def next_frame(stream, timeout=1.0):
+    return await asyncio.wait_for(stream.__anext__(), timeout)
+
+
+def test_publish_fans_out_to_every_stream():
+    async def run():
+        hub = EventHub(retry=0.5)
+        streams = [hub.stream() for _ in range(3)]
+        for stream in streams:
+            assert await next_frame(stream) == "retry: 500\n\n"
+        assert len(hub.subscribers) == 3
+
+        hub.publish({"collection": "gallery", "id": "a", "operation": "create"})
+        frames = [await next_frame(stream) for stream in streams]
+        assert len(set(frames)) == 1
+        assert 'data: {"collection":"gallery","id":"a","operation":"create"}' in frames[0]
+
+        for stream in streams:
+            await stream.aclose()
+        assert not hub.subscribers
+    asyncio.run(run())
+
+
+def test_slow_consumer_is_disconnected():
+    async def run():
+        hub = EventHub(max_queue=2)
+        slow = hub.stream()
+        await next_frame(slow)
+        for i in range(3):
+            hub.publish({"id": str(i)})
+        assert not hub.subscribers
+        # The buffer is dropped and the stream ends at the close marker
+        try:
+            frame = await next_frame(slow)
+        except StopAsyncIteration:
+            frame = None
+        assert frame is None
+    asyncio.run(run())
+
+
+def test_idle_stream_sends_heartbeats():
+    async def run():
+        hub = EventHub(heartbeat=0.01)
+        stream = hub.stream()
+        await next_frame(stream)
+        assert await next_frame(stream) == ": heartbeat\n\n"
+        await stream.aclose()
+    asyncio.run(run())
+
+
+def test_stream_takes_a_slot_only_once_started():
+    async def run():
+        hub = EventHub(max_subscribers=1)
+        unstarted = hub.stream()
+        assert not hub.subscribers
+        await unstarted.aclose()
+
+        stream = hub.stream()
+        await next_frame(stream)
+        assert hub.full
+        # A stream started past the limit ends without taking a slot
+        extra = hub.stream()
+        try:
+            await next_frame(extra)
+            raise AssertionError("stream over the limit should end")
+        except StopAsyncIteration:
+            pass
+        assert len(hub.subscribers) == 1
+        await stream.aclose()
+    asyncio.run(run())
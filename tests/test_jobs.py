@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timezone
+
+from jobs import JobQueue
+from storage import MemoryStorage
+
+
+async def wait_for_status(collection, job_id, status, timeout=2.0):
+    async def poll():
+        while True:
+            job = await collection.find_one({"id": job_id}, {"_id": 0})
+            if job and job["status"] == status:
+                return job
+            await asyncio.sleep(0.01)
+    return await asyncio.wait_for(poll(), timeout)
+
+
+def run_queue(test, **options):
+    async def run():
+        collection = MemoryStorage().jobs
+        queue = JobQueue(collection, base_delay=0.01, max_delay=0.05, **options)
+        try:
+            await test(queue, collection)
+        finally:
+            await queue.stop()
+    asyncio.run(run())
+
+
+def test_enqueue_persists_and_runs():
+    async def test(queue, collection):
+        received = []
+
+        async def handler(payload):
+            received.append(payload)
+        queue.register("greet", handler)
+        await queue.start()
+
+        job_id = queue.enqueue("greet", {"name": "Dhadak"})
+        job = await wait_for_status(collection, job_id, "done")
+        assert received == [{"name": "Dhadak"}]
+        assert job["attempts"] == 1
+        assert job["payload"] == {"name": "Dhadak"}
+        assert isinstance(job["finished_at"], datetime)
+    run_queue(test)
+
+
+def test_failed_job_is_retried_with_backoff():
+    async def test(queue, collection):
+        calls = []
+
+        async def flaky(payload):
+            calls.append(asyncio.get_running_loop().time())
+            if len(calls) < 3:
+                raise RuntimeError("smtp down")
+        queue.register("flaky", flaky)
+        await queue.start()
+
+        job = await wait_for_status(collection, queue.enqueue("flaky", {}), "done")
+        assert job["attempts"] == 3
+        assert job["last_error"] is None
+        # base_delay, then twice base_delay
+        assert calls[1] - calls[0] >= 0.01
+        assert calls[2] - calls[1] >= 0.02
+    run_queue(test)
+
+
+def test_job_fails_after_max_attempts():
+    async def test(queue, collection):
+        calls = []
+
+        async def broken(payload):
+            calls.append(payload)
+            raise RuntimeError("boom")
+        queue.register("broken", broken)
+        await queue.start()
+
+        job = await wait_for_status(collection, queue.enqueue("broken", {}), "failed")
+        assert len(calls) == 3
+        assert job["last_error"] == "boom"
+    run_queue(test, max_attempts=3)
+
+
+def test_start_recovers_pending_and_running_jobs():
+    async def test(queue, collection):
+        now = datetime.now(timezone.utc).isoformat()
+        for job_id, status in [("a", "pending"), ("b", "running"), ("c", "done")]:
+            await collection.insert_one({"id": job_id, "name": "noop", "payload": {"job": job_id}, "status": status, "attempts": 0, "last_error": None, "created_at": now, "run_at": now})
+        received = []
+
+        async def noop(payload):
+            received.append(payload["job"])
+        queue.register("noop", noop)
+        await queue.start()
+
+        await wait_for_status(collection, "a", "done")
+        await wait_for_status(collection, "b", "done")
+        assert sorted(received) == ["a", "b"]
+    run_queue(test)
+
+
+def test_failed_bookkeeping_does_not_drop_the_job():
+    async def test(queue, collection):
+        update_one = collection.update_one
+        failures = iter([True, True])
+
+        async def unreliable_update_one(*args, **kwargs):
+            if next(failures, False):
+                raise ConnectionError("mongo blip")
+            return await update_one(*args, **kwargs)
+        collection.update_one = unreliable_update_one
+        received = []
+
+        async def handler(payload):
+            received.append(payload)
+        queue.register("greet", handler)
+        await queue.start()
+
+        job_id = queue.enqueue("greet", {})
+        await wait_for_status(collection, job_id, "done")
+        assert received == [{}]
+    run_queue(test)
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from snapshot import ReadReplica
+
+
+def test_on_fresh_runs_after_refresh_in_primary_mode(tmp_path):
+    async def run():
+        state = {"value": "old"}
+        loading = asyncio.Event()
+        release = asyncio.Event()
+
+        async def load():
+            value = state["value"]
+            loading.set()
+            await release.wait()
+            return value
+
+        replica = ReadReplica(tmp_path / "replica.sqlite3", {"about": load}, mode="primary", debounce=0, refresh_interval=3600)
+        replica._store("about", "old", persist=False)
+        seen = []
+
+        state["value"] = "first"
+        replica.mark_dirty("about", on_fresh=lambda: seen.append(replica.cached("about")))
+        await loading.wait()
+        # A write landing while the refresh is loading gets its own refresh
+        state["value"] = "second"
+        loading.clear()
+        replica.mark_dirty("about", on_fresh=lambda: seen.append(replica.cached("about")))
+        release.set()
+        while replica._pending:
+            await asyncio.sleep(0)
+
+        assert seen == ["first", "second"]
+        assert replica.cached("about") == "second"
+        await replica.stop()
+
+    asyncio.run(run())
+
+
+def test_on_fresh_runs_immediately_when_reads_are_live(tmp_path):
+    async def load():
+        return "live"
+
+    async def run():
+        replica = ReadReplica(tmp_path / "replica.sqlite3", {"about": load}, mode="fallback", debounce=60)
+        seen = []
+        replica.mark_dirty("about", on_fresh=lambda: seen.append(True))
+        assert seen == [True]
+        await replica.stop()
+
+    asyncio.run(run())
+
+
+def test_snapshot_survives_restart(tmp_path):
+    async def failing():
+        raise ConnectionError("mongo down")
+
+    async def run():
+        replica = ReadReplica(tmp_path / "replica.sqlite3", {"team": failing}, mode="fallback")
+        await asyncio.to_thread(replica._save, "team", '[{"id": "a"}]', time.time())
+
+        restarted = ReadReplica(tmp_path / "replica.sqlite3", {"team": failing}, mode="fallback", refresh_interval=3600)
+        await restarted.start()
+        assert await restarted.read("team") == [{"id": "a"}]
+        await restarted.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,75 @@
+import asyncio
+
+from spam import ContactFilter, fingerprint, normalize_email, spam_score
+from storage import MemoryStorage
+
+MESSAGE = "I would like to join the dance committee"
+
+
+def make_filter(db=None, **options):
+    return ContactFilter(db or MemoryStorage(), **options)
+
+
+def test_fingerprint_normalizes_email_and_whitespace():
+    assert normalize_email(" Dancer+Events@Example.COM ") == "dancer@example.com"
+    assert fingerprint("Dancer+tag@example.com", "Hello   there\nfriend") == fingerprint("dancer@example.com", "hello there friend")
+    assert fingerprint("dancer@example.com", "hello") != fingerprint("other@example.com", "hello")
+
+
+def test_spam_score_thresholds():
+    assert spam_score("Visitor", MESSAGE) == 0.0
+    assert spam_score("Visitor", "cheap pills http://a.example http://b.example") >= 0.6
+    assert spam_score("http://spam.example", MESSAGE) == 0.4
+    assert spam_score("Visitor", "hi") == 0.1
+
+
+def test_duplicates_are_caught_in_memory_and_by_the_unique_index():
+    async def run():
+        db = MemoryStorage()
+        first = make_filter(db)
+        await first.start()
+        assert (await first.check("Visitor", "a@example.com", MESSAGE)).status == "accept"
+        assert (await first.check("Visitor", "A+x@example.com", MESSAGE)).status == "duplicate"
+
+        # Another process has not seen it, but the shared index has
+        second = make_filter(db)
+        assert (await second.check("Visitor", "a@example.com", MESSAGE)).status == "duplicate"
+        assert first.stats()["duplicate"] == 1
+        assert second.stats()["duplicate"] == 1
+    asyncio.run(run())
+
+
+def test_release_allows_a_retry():
+    async def run():
+        contact_filter = make_filter()
+        await contact_filter.start()
+        verdict = await contact_filter.check("Visitor", "a@example.com", MESSAGE)
+        await contact_filter.release(verdict.fingerprint)
+        assert (await contact_filter.check("Visitor", "a@example.com", MESSAGE)).status == "accept"
+    asyncio.run(run())
+
+
+def test_quarantine_and_counters():
+    async def run():
+        contact_filter = make_filter(quarantine_score=0.5)
+        await contact_filter.start()
+        spam = await contact_filter.check("Visitor", "b@example.com", "buy now http://a.example http://b.example")
+        assert spam.status == "quarantine"
+        assert spam.score >= 0.5
+        assert (await contact_filter.check("Visitor", "c@example.com", MESSAGE)).status == "accept"
+        stats = contact_filter.stats()
+        assert (stats["accepted"], stats["quarantined"], stats["duplicate"], stats["burst"]) == (1, 1, 0, 0)
+        assert stats["recent_fingerprints"] == 2
+    asyncio.run(run())
+
+
+def test_burst_is_quarantined_not_rejected():
+    async def run():
+        contact_filter = make_filter(burst_limit=2)
+        await contact_filter.start()
+        verdicts = [await contact_filter.check("Visitor", "victim@example.com", f"{MESSAGE} {i}") for i in range(4)]
+        assert [verdict.status for verdict in verdicts] == ["accept", "accept", "quarantine", "quarantine"]
+        # Other senders are unaffected
+        assert (await contact_filter.check("Visitor", "other@example.com", MESSAGE)).status == "accept"
+        assert contact_filter.stats()["burst"] == 2
+    asyncio.run(run())
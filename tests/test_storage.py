@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from storage import MemoryRepository, MemoryStorage, Repository, project
+
+
+def test_project_id_only():
+    doc = {"_id": 1, "id": "a", "title": "Award"}
+    assert project(doc, {"_id": 1}) == {"_id": 1}
+    assert project(doc, {"_id": 0}) == {"id": "a", "title": "Award"}
+    with pytest.raises(NotImplementedError):
+        project(doc, {"id": 1, "title": 0})
+
+
+def test_unique_index_treats_missing_as_null():
+    async def run():
+        repo = MemoryRepository()
+        await repo.create_index("key", unique=True)
+        await repo.insert_one({"content": "first"})
+        with pytest.raises(DuplicateKeyError):
+            await repo.insert_one({"content": "second", "key": None})
+    asyncio.run(run())
+
+
+def test_expired_documents_do_not_block_unique_inserts():
+    async def run():
+        db = MemoryStorage()
+        await db.fingerprints.create_index("fingerprint", unique=True)
+        await db.ensure_ttl_index("fingerprints", "created_at", 60, "ttl")
+        await db.fingerprints.insert_one({"fingerprint": "a", "created_at": datetime.now(timezone.utc) - timedelta(seconds=120)})
+        # Only inserts touch the collection; the old fingerprint has expired
+        await db.fingerprints.insert_one({"fingerprint": "a", "created_at": datetime.now(timezone.utc)})
+        assert len(await db.fingerprints.find({})) == 1
+    asyncio.run(run())
+
+
+def test_ttl_follows_updates_of_the_expiry_field():
+    async def run():
+        db = MemoryStorage()
+        await db.ensure_ttl_index("jobs", "finished_at", 1, "ttl")
+        now = datetime.now(timezone.utc)
+        await db.jobs.insert_one({"id": "extended", "finished_at": now})
+        await db.jobs.insert_one({"id": "expired", "finished_at": now})
+        await db.jobs.insert_one({"id": "backdated", "finished_at": now + timedelta(hours=1)})
+        await db.jobs.insert_one({"id": "running"})
+        await db.jobs.update_one({"id": "extended"}, {"$set": {"finished_at": now + timedelta(hours=1)}})
+        await db.jobs.update_one({"id": "backdated"}, {"$set": {"finished_at": now - timedelta(hours=1)}})
+        await asyncio.sleep(1.1)
+        assert sorted(doc["id"] for doc in await db.jobs.find({})) == ["extended", "running"]
+    asyncio.run(run())
+
+
+def test_incomplete_repository_fails_on_instantiation():
+    class Partial(Repository):
+        async def find(self, filter=None, projection=None, sort=None, limit=None):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()